@@ -0,0 +1,148 @@
+import csv
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/jsonl", "application/json-lines"}
+CSV_MEDIA_TYPES = {"text/csv"}
+MAX_LINE_BYTES = 64 * 1024
+
+
+async def iter_lines(request: Request) -> AsyncIterator[tuple[int, str]]:
+    """Yield ``(line_number, text)`` from the request body as chunks arrive.
+
+    Only the current partial line is buffered, so the body size is unbounded.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_number += 1
+            yield line_number, _decode(raw, line_number)
+        if len(buffer) > MAX_LINE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Line {line_number + 1} exceeds {MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield line_number + 1, _decode(buffer, line_number + 1)
+
+
+def _decode(raw: bytes, line_number: int) -> str:
+    try:
+        return raw.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"Line {line_number} is not valid UTF-8")
+
+
+def body_format(request: Request) -> str:
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type in NDJSON_MEDIA_TYPES:
+        return "ndjson"
+    if media_type in CSV_MEDIA_TYPES:
+        return "csv"
+    raise HTTPException(status_code=415, detail="Send the body as application/x-ndjson or text/csv")
+
+
+class _NeedMoreInput(Exception):
+    """The CSV row being parsed continues on a line that has not arrived yet."""
+
+
+class _CsvFeed:
+    """Input for one ``csv.reader`` that is fed lines as the body streams in.
+
+    ``csv.reader`` drops a partly parsed row when its input raises, so lines
+    stay buffered until the row they belong to is complete and are replayed
+    from the row's first line each time the reader asks for more.
+    """
+
+    def __init__(self):
+        self.lines: list[tuple[int, str]] = []
+        self.size = 0
+        self.position = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.position < len(self.lines):
+            self.position += 1
+            return self.lines[self.position - 1][1]
+        if self.closed:
+            raise StopIteration
+        raise _NeedMoreInput
+
+    def append(self, line_number: int, line: str) -> None:
+        self.lines.append((line_number, line + "\n"))
+        self.size += len(line.encode("utf-8")) + 1
+        if self.size > MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=413, detail=f"Row starting at line {self.lines[0][0]} exceeds {MAX_LINE_BYTES} bytes"
+            )
+
+    def next_row(self, reader) -> Optional[tuple[int, list[str]]]:
+        """``(first_line_number, cells)`` of the next complete row, or None until more lines arrive."""
+        self.position = 0
+        try:
+            cells = next(reader)
+        except (_NeedMoreInput, StopIteration):
+            return None
+        line_number = self.lines[0][0]
+        del self.lines[: self.position]
+        self.size = sum(len(line.encode("utf-8")) for _, line in self.lines)
+        return line_number, cells
+
+
+async def iter_csv_rows(request: Request) -> AsyncIterator[tuple[int, list[str]]]:
+    """Yield ``(line_number, cells)`` per CSV row; quoted fields may span lines."""
+    feed = _CsvFeed()
+    reader = csv.reader(feed)
+    async for line_number, line in iter_lines(request):
+        if not feed.lines and not line.strip():
+            continue
+        feed.append(line_number, line)
+        while (row := feed.next_row(reader)) is not None:
+            yield row
+    feed.closed = True
+    while (row := feed.next_row(reader)) is not None:
+        yield row
+
+
+async def iter_records(request: Request) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Yield ``(line_number, record, error)`` for each non-blank NDJSON object or CSV row.
+
+    CSV bodies start with a header row; empty cells are treated as missing and
+    a row is reported at the line it starts on. A record that cannot be parsed
+    is reported with ``record=None`` and an error.
+    """
+    if body_format(request) == "csv":
+        header = None
+        async for line_number, cells in iter_csv_rows(request):
+            if header is None:
+                header = [cell.strip().lower() for cell in cells]
+                continue
+            if len(cells) != len(header):
+                yield line_number, None, f"Expected {len(header)} columns, got {len(cells)}"
+                continue
+            yield line_number, {key: value for key, value in zip(header, cells) if value != ""}, None
+        return
+    async for line_number, line in iter_lines(request):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Query
+
+from auth.auth_service import require_admin_or_god, verified_tokens
+from auth.password_hasher import password_hasher
+from auth.principal_cache import principal_cache
+from auth.revocation import revocations
+from db.db_connection import engines
+from db.pool_stats import pool_status
+from db.redis_connection import ping as redis_ping, pool_stats as redis_pool_stats
+from db.query_stats import query_stats
+
+
+router = APIRouter(dependencies=[Depends(require_admin_or_god)])
+
+
+@router.get("/db/pool")
+def read_pool_stats():
+    return {"pools": {name: pool_status(engine) for name, engine in engines().items()}}
+
+
+@router.get("/db/queries")
+def read_query_stats(limit: int = Query(default=50, ge=1, le=500)):
+    return {
+        "slow_query_ms": query_stats.slow_ms,
+        "sample_rate": query_stats.sample_rate,
+        "statements": query_stats.snapshot(limit),
+    }
+
+
+@router.delete("/db/queries")
+def reset_query_stats():
+    query_stats.reset()
+    return {"message": "Query stats reset"}
+
+
+@router.get("/auth/hashing")
+def read_hashing_stats():
+    return password_hasher.metrics()
+
+
+@router.get("/auth/principals")
+def read_principal_cache_stats():
+    return principal_cache.stats()
+
+
+@router.get("/auth/tokens")
+def read_token_cache_stats():
+    return verified_tokens.stats()
+
+
+@router.get("/auth/revocations")
+def read_revocation_stats():
+    return revocations.stats()
+
+
+@router.get("/redis")
+async def read_redis_stats():
+    return {"health": await redis_ping(), "pools": redis_pool_stats()}
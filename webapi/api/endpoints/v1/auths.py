@@ -1,17 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, Body, Query
-from sqlmodel import Session, select
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Request
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models.user import User
-from passlib.hash import sha256_crypt
-from db.db_connection import get_session
-from auth.auth_service import authenticate_user, crear_jwt, get_current_user, get_current_db_user
+from db.db_connection import get_session, release_connection
+from auth.password_hasher import password_hasher
+from auth.principal_cache import principal_cache
+from auth.rate_limit import enforce_auth_rate_limit
+from auth.revocation import revocations
+from auth.auth_service import (
+    authenticate_user, bearer_scheme, crear_jwt, get_current_user, get_current_db_user, verified_payload
+)
+from fastapi.security import HTTPAuthorizationCredentials
 from infrastructure.email.smtp_service import send_email
 import secrets
 import base64
 import re
 import binascii
 
-from redis import Redis
-from db.redis_connection import get_redis
+from redis.asyncio import Redis
+from db.redis_connection import get_async_redis
 from pydantic import BaseModel, Field
 from schemas.login_schema import LoginRequest
 from schemas.user_schema import UserCreate, UserRead
@@ -29,29 +36,31 @@ class RecoveryRedeemRequest(BaseModel):
 
 
 @router.post("/signup")
-def signup(payload: UserCreate, session: Session = Depends(get_session)):
+async def signup(payload: UserCreate, session: AsyncSession = Depends(get_session)):
     statement = select(User).where(User.username == payload.username)
-    result = session.exec(statement)
+    result = await session.exec(statement)
     user_exists = result.one_or_none()
     if user_exists:
         raise HTTPException(status_code=400, detail="username already taken")
     if payload.role not in {"user", "admin", "god"}:
         raise HTTPException(status_code=400, detail="invalid role")
+    await release_connection(session)
     user = User(
         username=payload.username,
         name=payload.name,
         last_name=payload.last_name,
         email=payload.email,
-        hashed_password=sha256_crypt.hash(payload.hashed_password),
+        hashed_password=await password_hasher.hash(payload.hashed_password),
         role=payload.role,
     )
     session.add(user)
-    session.commit()
+    await session.commit()
     return {"message": "User created successfully"}
 
 @router.post("/login")
-def login(request: LoginRequest, session: Session = Depends(get_session)):
-    user = authenticate_user(request.username, request.password, session)
+async def login(request: LoginRequest, http_request: Request, session: AsyncSession = Depends(get_session)):
+    await enforce_auth_rate_limit(http_request, "login", request.username)
+    user = await authenticate_user(request.username, request.password, session)
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     access_token = crear_jwt(
@@ -60,6 +69,17 @@ def login(request: LoginRequest, session: Session = Depends(get_session)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+    payload = verified_payload(credentials.credentials)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Unauthorized token")
+    if "jti" not in payload:
+        raise HTTPException(status_code=400, detail="Token has no jti and cannot be revoked")
+    await revocations.revoke_token(payload["jti"], payload["exp"])
+    return {"message": "Logged out"}
+
+
 @router.get("/profile", response_model=UserRead)
 def profile(current_user: User = Depends(get_current_db_user)):
     return current_user
@@ -92,42 +112,50 @@ def _resolve_recover_request(body: RecoveryRedeemRequest | None, key: str | None
 
 @router.post("/generate")
 async def generate_password(
+    http_request: Request,
     body: RecoveryGenerateRequest | None = Body(default=None),
     username: str | None = Query(default=None),
     ttl: int = Query(default=300, ge=60, le=3600),
-    redis: Redis = Depends(get_redis),
-    session: Session = Depends(get_session)
+    redis: Redis = Depends(get_async_redis),
+    session: AsyncSession = Depends(get_session)
 ):
     request = _resolve_generate_request(body, username, ttl)
+    await enforce_auth_rate_limit(http_request, "generate", request.username)
     statement = select(User).where(User.username == request.username)
-    result = session.exec(statement)
+    result = await session.exec(statement)
     user = result.one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    await release_connection(session, user)
 
     """Generate random key"""
     encoded = base64.b64encode(request.username.encode('utf-8')).decode('utf-8')
     key = f"{secrets.token_hex(16)}.{encoded}"
-    if redis.exists(key):
-        raise HTTPException(status_code=400, detail="Key already exists")
     """Generate and store a temporary password"""
     password = secrets.token_urlsafe(16)
-    user.hashed_password = sha256_crypt.hash(password)
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-    email_body = f"Hey {user.username} this is your recovery key:\n--> {key} <--\nit expires in {request.ttl/60}"
-    await send_email(user.email, user.username, email_body)
-    redis.setex(key, request.ttl, password)
+    # SET NX EX checks for a clashing key and stores the password in one round trip.
+    if not await redis.set(key, password, nx=True, ex=request.ttl):
+        raise HTTPException(status_code=400, detail="Key already exists")
+    try:
+        user.hashed_password = await password_hasher.hash(password)
+        session.add(user)
+        await session.commit()
+        await principal_cache.invalidate(user.username)
+        await revocations.revoke_user(user.username)
+        email_body = f"Hey {user.username} this is your recovery key:\n--> {key} <--\nit expires in {request.ttl/60}"
+        await send_email(user.email, user.username, email_body)
+    except Exception:
+        await redis.delete(key)
+        raise
 
     return {"message": f"Message sent successfully, it expires in {request.ttl/60} minutes"}
 
 @router.post("/recover")
-def recover_password(
+async def recover_password(
     body: RecoveryRedeemRequest | None = Body(default=None),
     key: str | None = Query(default=None),
-    redis: Redis = Depends(get_redis),
-    session: Session = Depends(get_session)
+    redis: Redis = Depends(get_async_redis),
+    session: AsyncSession = Depends(get_session)
 ):
     request = _resolve_recover_request(body, key)
     key = request.key
@@ -147,12 +175,12 @@ def recover_password(
     except (binascii.Error, UnicodeDecodeError) as e:
         raise HTTPException(status_code=401, detail=f"Decode error: {e}")
     statement = select(User).where(User.username == username)
-    result = session.exec(statement)
+    result = await session.exec(statement)
     user = result.one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="Key corrputed")
     """Retrieve a temporary password if it exists"""
-    password = redis.get(key)
+    password = await redis.get(key)
     if password is None:
         raise HTTPException(status_code=404, detail="Password not found in redis or expired")
     return {"key": key, "password": password}
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends
 
-from auth.auth_service import get_current_db_user
-from models.user import User
+from auth.auth_service import TokenPrincipal, get_token_principal
 
 
 router = APIRouter()
@@ -23,10 +22,10 @@ MODEL_OPTIONS = [
 
 
 @router.get("/categories")
-def read_categories(_current_user: User = Depends(get_current_db_user)):
+def read_categories(_current_user: TokenPrincipal = Depends(get_token_principal)):
     return {"items": CATEGORY_OPTIONS}
 
 
 @router.get("/models")
-def read_models(_current_user: User = Depends(get_current_db_user)):
+def read_models(_current_user: TokenPrincipal = Depends(get_token_principal)):
     return {"items": MODEL_OPTIONS}
@@ -1,29 +1,95 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
-from sqlmodel import Session, select
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, func, insert, or_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Optional
 from models.user import User
 from models.prompts import Prompts
-from db.db_connection import get_session
-from auth.auth_service import get_current_db_user
+from models.prompt_stats import PromptStats
+from db.db_connection import (
+    get_prompt_committer,
+    get_read_session,
+    get_session,
+    get_stream_session_factory,
+    release_connection,
+    replica_router,
+)
+from db.group_commit import PromptGroupCommitter
+from db.replicas import principal_key
+from db.fulltext import search_rank, search_terms
+from db.prompt_stats import StatsDelta, apply_stats_delta
+from db.projections import columns_for
+from auth.auth_service import TokenPrincipal, get_token_principal
 from infrastructure.email.smtp_service import send_email
-from schemas.prompt_schema import PromptCreate
+from schemas.prompt_schema import (
+    BulkImportReport,
+    BulkRowError,
+    PromptBatch,
+    PromptBatchResult,
+    PromptCreate,
+    PromptFilters,
+    PromptSearchHit,
+    PromptStatsGroup,
+)
+from api.bulk import iter_records, validation_detail
+from api.export import ExportFormat, export_response
+from api.pagination import cursor_id, rank_cursor, set_next_cursor
+from core import config
 
 router = APIRouter()
 
+
+def build_prompts_query(current_user: TokenPrincipal, filters: PromptFilters, last_id: Optional[int] = None,
+                        columns: Optional[list] = None):
+    """Prompts visible to ``current_user`` matching ``filters``, in id order.
+
+    Regular users only ever see their own prompts; admins and gods may filter
+    by any user. The prompts indexes are designed around these predicates.
+    Pass ``columns`` to select plain rows instead of ``Prompts`` entities.
+    """
+    statement = select(*columns) if columns else select(Prompts)
+    statement = statement.where(*prompt_conditions(current_user, filters))
+    if last_id is not None:
+        statement = statement.where(Prompts.id > last_id)
+    return statement.order_by(Prompts.id)
+
+
+def prompt_conditions(current_user: TokenPrincipal, filters: PromptFilters) -> list:
+    """WHERE clauses for role scoping and filters, shared by listing and search."""
+    conditions = []
+    if current_user.role not in {"admin", "god"}:
+        conditions.append(Prompts.user_id == current_user.id)
+    elif filters.user_id is not None:
+        conditions.append(Prompts.user_id == filters.user_id)
+    if filters.category:
+        conditions.append(Prompts.category == filters.category)
+    if filters.model_name:
+        conditions.append(Prompts.model_name == filters.model_name)
+    if filters.rate is not None:
+        conditions.append(Prompts.rate == filters.rate)
+    return conditions
+
+
 @router.post("", response_model=Prompts)
 async def create_prompt(
+    request: Request,
     prompt: PromptCreate,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_db_user),
+    session: AsyncSession = Depends(get_session),
+    current_user: TokenPrincipal = Depends(get_token_principal),
+    committer: Optional[PromptGroupCommitter] = Depends(get_prompt_committer),
     send_email_header: Optional[str] = Header("false", alias="send_email")
 ):
     target_user_id = prompt.user_id or current_user.id
-    prompt_user = session.get(User, target_user_id)
+    prompt_user = await session.get(User, target_user_id)
     if not prompt_user:
         raise HTTPException(status_code=404, detail="User not found")
     if prompt_user.id != current_user.id and current_user.role != "god":
         raise HTTPException(status_code=403, detail="Cannot create prompts for another user")
 
+    email, username = prompt_user.email, prompt_user.username
+
     created_prompt = Prompts(
         user_id=prompt_user.id,
         model_name=prompt.model_name,
@@ -32,52 +98,277 @@ async def create_prompt(
         rate=prompt.rate,
     )
 
-    session.add(created_prompt)
-    session.commit()
-    session.refresh(created_prompt)
+    if committer is not None:
+        # Release the request's pooled connection first: the committer needs
+        # one, and the embedded SQLite writer pool holds a single connection.
+        await release_connection(session)
+        created_prompt.id = await committer.submit(created_prompt.model_dump(exclude={"id"}))
+        replica_router.pin(principal_key(request))
+    else:
+        session.add(created_prompt)
+        delta = StatsDelta()
+        delta.add_prompt(created_prompt)
+        await apply_stats_delta(session, delta)
+        await session.commit()
+        await session.refresh(created_prompt)
+        await release_connection(session, created_prompt)
 
     # Email notification is best-effort and should not block prompt persistence.
     if str(send_email_header).lower() == "true":
         try:
-            await send_email(prompt_user.email, prompt_user.username)
+            await send_email(email, username)
         except Exception:
             pass
 
     return created_prompt
 
+
+MAX_REPORTED_ERRORS = 1000
+
+
+@router.post("/bulk", response_model=BulkImportReport)
+async def bulk_import_prompts(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: TokenPrincipal = Depends(get_token_principal),
+):
+    """Import prompts from a streamed NDJSON or CSV body.
+
+    Rows are validated as they arrive and inserted with one multi-row INSERT
+    and commit per ``PROMPTS_BULK_BATCH_SIZE`` rows, so a failed batch never
+    rolls back earlier ones. Invalid rows are skipped and listed in the report.
+    """
+    report = BulkImportReport()
+    known_user_ids = {current_user.id}
+    batch: list[tuple[int, dict]] = []
+
+    def reject(line: int, detail: str) -> None:
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(BulkRowError(line=line, detail=detail))
+        else:
+            report.errors_truncated = True
+
+    async def flush() -> None:
+        # Resolve every unseen owner in the batch with a single query.
+        missing = {row["user_id"] for _, row in batch} - known_user_ids
+        if missing:
+            found = await session.exec(select(User.id).where(User.id.in_(missing)))
+            known_user_ids.update(found.all())
+        accepted = []
+        for line, row in batch:
+            if row["user_id"] in known_user_ids:
+                accepted.append((line, row))
+            else:
+                reject(line, "User not found")
+        batch.clear()
+        if not accepted:
+            return
+        try:
+            rows = [row for _, row in accepted]
+            await session.exec(insert(Prompts).values(rows))
+            delta = StatsDelta()
+            for row in rows:
+                delta.add(row["user_id"], row["category"], row["model_name"], row["rate"])
+            await apply_stats_delta(session, delta)
+            await session.commit()
+        except SQLAlchemyError:
+            await session.rollback()
+            for line, _ in accepted:
+                reject(line, "Database error, batch not inserted")
+            return
+        report.inserted += len(accepted)
+
+    async for line, record, error in iter_records(request):
+        if error:
+            reject(line, error)
+            continue
+        try:
+            prompt = PromptCreate.model_validate(record)
+        except ValidationError as exc:
+            reject(line, validation_detail(exc))
+            continue
+        target_user_id = prompt.user_id or current_user.id
+        if target_user_id != current_user.id and current_user.role != "god":
+            reject(line, "Cannot create prompts for another user")
+            continue
+        batch.append((line, {**prompt.model_dump(exclude={"user_id"}), "user_id": target_user_id}))
+        if len(batch) >= config.PROMPTS_BULK_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return report
+
+
+@router.post("/batch", response_model=PromptBatchResult)
+async def batch_mutate_prompts(
+    batch: PromptBatch,
+    session: AsyncSession = Depends(get_session),
+    current_user: TokenPrincipal = Depends(get_token_principal),
+):
+    """Update or delete every prompt selected by ``ids`` or ``filters`` in one transaction.
+
+    Ownership rules match the single-prompt routes but are part of the WHERE
+    clause: admins are refused, users only touch their own prompts and gods
+    any. Prompts outside the caller's reach are simply not affected, but a
+    ``filters.user_id`` naming another user is refused rather than ignored.
+    """
+    if current_user.role == "admin":
+        raise HTTPException(status_code=403, detail=f"Admins cannot {batch.action} prompts")
+    filter_user_id = batch.filters.user_id if batch.filters else None
+    if filter_user_id is not None and filter_user_id != current_user.id and current_user.role != "god":
+        raise HTTPException(status_code=403, detail=f"Cannot {batch.action} another user's prompts")
+    conditions = prompt_conditions(current_user, batch.filters or PromptFilters())
+    if batch.ids is not None:
+        conditions.append(Prompts.id.in_(batch.ids))
+
+    # Lock the selected rows and take their stats groups before changing them.
+    groups = (await session.exec(
+        select(Prompts.user_id, Prompts.category, Prompts.model_name, func.count(), func.sum(Prompts.rate))
+        .where(*conditions)
+        .group_by(Prompts.user_id, Prompts.category, Prompts.model_name)
+        .with_for_update()
+    )).all()
+    values = batch.values.model_dump(exclude_none=True) if batch.values else {}
+    delta = StatsDelta()
+    for user_id, category, model_name, count, rate_sum in groups:
+        delta.add_group(user_id, category, model_name, -count, -rate_sum)
+        if batch.action == "update":
+            delta.add_group(
+                user_id,
+                values.get("category", category),
+                values.get("model_name", model_name),
+                count,
+                values["rate"] * count if "rate" in values else rate_sum,
+            )
+
+    if batch.action == "delete":
+        statement = delete(Prompts)
+    else:
+        statement = update(Prompts).values(**values)
+    result = await session.exec(statement.where(*conditions).execution_options(synchronize_session=False))
+    await apply_stats_delta(session, delta)
+    await session.commit()
+    return PromptBatchResult(action=batch.action, affected=result.rowcount)
+
+
 @router.get("", response_model=list[Prompts])
-def read_prompts(
+async def read_prompts(
+    response: Response,
     skip: int = 0,
     limit: int = 10,
     user_id: Optional[int] = None,
     category: Optional[str] = None,
     model_name: Optional[str] = None,
     rate: Optional[int] = None,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_db_user),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+    current_user: TokenPrincipal = Depends(get_token_principal),
 ):
-    statement = select(Prompts)
-    if current_user.role not in {"admin", "god"}:
-        statement = statement.where(Prompts.user_id == current_user.id)
-    elif user_id is not None:
-        statement = statement.where(Prompts.user_id == user_id)
-    if category:
-        statement = statement.where(Prompts.category == category)
-    if model_name:
-        statement = statement.where(Prompts.model_name == model_name)
-    if rate is not None:
-        statement = statement.where(Prompts.rate == rate)
-    statement = statement.offset(skip).limit(limit)
-    prompts = session.exec(statement).all()
+    # A cursor (from the X-Next-Cursor header) replaces skip with an id seek,
+    # so deep pages cost the same as the first one.
+    last_id = cursor_id(cursor)
+    filters = PromptFilters(user_id=user_id, category=category, model_name=model_name, rate=rate)
+    # Plain rows instead of ORM entities: the list is serialized, never modified.
+    statement = build_prompts_query(current_user, filters, last_id, columns=columns_for(Prompts, Prompts))
+    if last_id is None:
+        statement = statement.offset(skip)
+    statement = statement.limit(limit)
+    prompts = (await session.exec(statement)).all()
     if not prompts:
         raise HTTPException(status_code=404, detail="No prompts found")
+    set_next_cursor(response, prompts, limit)
     return prompts
 
 
+@router.get("/search", response_model=list[PromptSearchHit])
+async def search_prompts(
+    response: Response,
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = 10,
+    user_id: Optional[int] = None,
+    category: Optional[str] = None,
+    model_name: Optional[str] = None,
+    rate: Optional[int] = None,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+    current_user: TokenPrincipal = Depends(get_token_principal),
+):
+    """Full-text search on prompt_text, most relevant first.
+
+    Visibility and filters match ``read_prompts``. Pages continue from the
+    ``X-Next-Cursor`` header, which carries the last ``(rank, id)``.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query has no searchable terms")
+    filters = PromptFilters(user_id=user_id, category=category, model_name=model_name, rate=rate)
+    statement = select(*columns_for(Prompts, Prompts)).where(*prompt_conditions(current_user, filters))
+    dialect_name = session.sync_session.get_bind().dialect.name
+    ranked = search_rank(statement, dialect_name, terms)
+    if ranked is None:
+        raise HTTPException(status_code=501, detail="Full-text search is not supported by this database")
+    statement, rank = ranked
+    after = rank_cursor(cursor)
+    if after is not None:
+        last_rank, last_id = after
+        statement = statement.where(or_(rank > last_rank, and_(rank == last_rank, Prompts.id > last_id)))
+    statement = statement.add_columns(rank.label("rank")).order_by(rank, Prompts.id).limit(limit)
+    hits = (await session.exec(statement)).all()
+    set_next_cursor(response, hits, limit, keys=("rank", "id"))
+    return hits
+
+
+@router.get("/stats", response_model=list[PromptStatsGroup])
+async def read_prompt_stats(
+    user_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_read_session),
+    current_user: TokenPrincipal = Depends(get_token_principal),
+):
+    """Prompt count and average rate per category and model, read from prompt_stats.
+
+    Regular users get their own numbers; admins and gods get global totals, or
+    one user's with ``user_id``. Cost grows with the number of groups, not prompts.
+    """
+    if current_user.role not in {"admin", "god"}:
+        user_id = current_user.id
+    prompt_count = func.sum(PromptStats.prompt_count)
+    statement = select(
+        PromptStats.category,
+        PromptStats.model_name,
+        prompt_count.label("prompt_count"),
+        (func.sum(PromptStats.rate_sum) * 1.0 / prompt_count).label("avg_rate"),
+    )
+    if user_id is not None:
+        statement = statement.where(PromptStats.user_id == user_id)
+    statement = (
+        statement.group_by(PromptStats.category, PromptStats.model_name)
+        .having(prompt_count > 0)
+        .order_by(PromptStats.category, PromptStats.model_name)
+    )
+    return (await session.exec(statement)).all()
+
+
+@router.get("/export")
+async def export_prompts(
+    user_id: Optional[int] = None,
+    category: Optional[str] = None,
+    model_name: Optional[str] = None,
+    rate: Optional[int] = None,
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    open_session=Depends(get_stream_session_factory),
+    current_user: TokenPrincipal = Depends(get_token_principal),
+):
+    """Stream every prompt ``read_prompts`` would return, without paging."""
+    filters = PromptFilters(user_id=user_id, category=category, model_name=model_name, rate=rate)
+    statement = build_prompts_query(current_user, filters, columns=columns_for(Prompts, Prompts))
+    return export_response(open_session, statement, export_format, "prompts")
+
+
 @router.get("/{prompt_id}", response_model=Prompts)
-def get_prompt(prompt_id: int, session: Session = Depends(get_session),
-               current_user: User = Depends(get_current_db_user)):
-    prompt = session.get(Prompts, prompt_id)
+async def get_prompt(prompt_id: int, session: AsyncSession = Depends(get_read_session),
+               current_user: TokenPrincipal = Depends(get_token_principal)):
+    prompt = await session.get(Prompts, prompt_id)
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
     if prompt.user_id != current_user.id and current_user.role not in {"admin", "god"}:
@@ -85,10 +376,11 @@ def get_prompt(prompt_id: int, session: Session = Depends(get_session),
     return prompt
 
 @router.put("/{prompt_id}", response_model=Prompts)
-def update_prompt(prompt_id: int, prompt: PromptCreate,
-                session: Session = Depends(get_session),
-                current_user: User = Depends(get_current_db_user)):
-    existing_prompt = session.get(Prompts, prompt_id)
+async def update_prompt(prompt_id: int, prompt: PromptCreate,
+                session: AsyncSession = Depends(get_session),
+                current_user: TokenPrincipal = Depends(get_token_principal)):
+    # Locked so a concurrent update or delete cannot take the same stats delta.
+    existing_prompt = await session.get(Prompts, prompt_id, with_for_update=True, populate_existing=True)
     if not existing_prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
     if current_user.role == "admin":
@@ -97,32 +389,39 @@ def update_prompt(prompt_id: int, prompt: PromptCreate,
         raise HTTPException(status_code=403, detail="Cannot update another user's prompt")
 
     target_user_id = prompt.user_id or existing_prompt.user_id
-    user = session.get(User, target_user_id)
+    user = await session.get(User, target_user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found for this prompt")
     if target_user_id != existing_prompt.user_id and current_user.role != "god":
         raise HTTPException(status_code=403, detail="Cannot reassign this prompt")
+    delta = StatsDelta()
+    delta.add_prompt(existing_prompt, sign=-1)
     existing_prompt.model_name = prompt.model_name
     existing_prompt.prompt_text = prompt.prompt_text
     existing_prompt.category = prompt.category
     existing_prompt.rate = prompt.rate
     existing_prompt.user_id = target_user_id
     session.add(existing_prompt)
-    session.commit()
-    session.refresh(existing_prompt)
+    delta.add_prompt(existing_prompt)
+    await apply_stats_delta(session, delta)
+    await session.commit()
+    await session.refresh(existing_prompt)
     return existing_prompt
 
 
 @router.delete("/{prompt_id}")
-def delete_prompt(prompt_id: int, session: Session = Depends(get_session),
-                current_user: User = Depends(get_current_db_user)):
-    prompt = session.get(Prompts, prompt_id)
+async def delete_prompt(prompt_id: int, session: AsyncSession = Depends(get_session),
+                current_user: TokenPrincipal = Depends(get_token_principal)):
+    prompt = await session.get(Prompts, prompt_id, with_for_update=True, populate_existing=True)
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found to delete")
     if current_user.role == "admin":
         raise HTTPException(status_code=403, detail="Admins cannot delete prompts")
     if prompt.user_id != current_user.id and current_user.role != "god":
         raise HTTPException(status_code=403, detail="Cannot delete another user's prompt")
-    session.delete(prompt)
-    session.commit()
+    await session.delete(prompt)
+    delta = StatsDelta()
+    delta.add_prompt(prompt, sign=-1)
+    await apply_stats_delta(session, delta)
+    await session.commit()
     return prompt
@@ -1,81 +1,158 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy import delete, func
+from sqlalchemy.orm import load_only, selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models.user import User
+from models.prompts import Prompts
+from models.prompt_stats import PromptStats
 from schemas.user_schema import UserRead, UserReadWithPrompts
-from db.db_connection import get_session
+from db.db_connection import get_read_session, get_session, get_stream_session_factory
+from db.prompt_stats import StatsDelta, apply_stats_delta
+from db.projections import columns_for, select_columns
 from auth.auth_service import get_current_user
-from passlib.hash import sha256_crypt
+from auth.password_hasher import password_hasher
+from auth.principal_cache import principal_cache
+from auth.revocation import revocations
+from api.export import ExportFormat, export_response
+from api.pagination import cursor_id, set_next_cursor
+from core import config
 
 
 router = APIRouter()
 
 @router.get("", response_model=list[UserRead])
-def read_users(skip: int = 0, limit: int = 10,
-               session: Session = Depends(get_session),
+async def read_users(response: Response, skip: int = 0, limit: int = 10,
+               cursor: Optional[str] = None,
+               session: AsyncSession = Depends(get_read_session),
                current_user: dict = Depends(get_current_user)):
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
+    last_id = cursor_id(cursor)
+    statement = select_columns(User, UserRead)
+    if last_id is not None:
+        statement = statement.where(User.id > last_id)
+    else:
+        statement = statement.offset(skip)
+    statement = statement.order_by(User.id).limit(limit)
+    users = (await session.exec(statement)).all()
     if not users:
         raise HTTPException(status_code=404, detail="User not found")
+    set_next_cursor(response, users, limit)
     return users
 
 
+@router.get("/export")
+async def export_users(export_format: ExportFormat = Query("ndjson", alias="format"),
+               open_session=Depends(get_stream_session_factory),
+               current_user: dict = Depends(get_current_user)):
+    """Stream every user (``UserRead`` fields only) in id order."""
+    statement = select_columns(User, UserRead).order_by(User.id)
+    return export_response(open_session, statement, export_format, "users")
+
+
 @router.get("/prompts/{user_id}", response_model=UserReadWithPrompts)
-def get_user_with_prompts(user_id: int, session: Session = Depends(get_session),
+async def get_user_with_prompts(user_id: int, session: AsyncSession = Depends(get_read_session),
                current_user: dict = Depends(get_current_user)):
-    statement = select(User).where(User.id == user_id)
-    result = session.exec(statement)
+    statement = select(User).where(User.id == user_id).options(
+        load_only(*columns_for(User, UserReadWithPrompts)),
+        selectinload(User.prompts),
+    )
+    result = await session.exec(statement)
     user = result.one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    # Access prompts within session to trigger lazy load
-    _ = user.prompts
     return user
 
 
 @router.get("/{user_id}", response_model=UserRead)
-def get_user(user_id: int, session: Session = Depends(get_session),
+async def get_user(user_id: int, session: AsyncSession = Depends(get_read_session),
                current_user: dict = Depends(get_current_user)):
-    user = session.get(User, user_id)
+    user = (await session.exec(select_columns(User, UserRead).where(User.id == user_id))).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @router.put("/{user_id}", response_model=User)
-def update_user(user_id: int, user: User,
-                session: Session = Depends(get_session),
+async def update_user(user_id: int, user: User,
+                session: AsyncSession = Depends(get_session),
                 current_user: dict = Depends(get_current_user)):
     user.name = user.name.lower()
     user.last_name = user.last_name.lower()
-    existing_user = session.get(User, user_id)
+    # Hash before touching the session so no pooled connection is held meanwhile.
+    hashed_password = await password_hasher.hash(user.hashed_password)
+    existing_user = await session.get(User, user_id)
     if not existing_user:
         raise HTTPException(status_code=404, detail="User not found")
     existing_user.name = user.name
     existing_user.last_name = user.last_name
     existing_user.email = user.email
-    existing_user.hashed_password = sha256_crypt.hash(user.hashed_password)
+    existing_user.hashed_password = hashed_password
     # Ensure the username is unique
     statement = select(User).where(User.username == user.username, User.id != user_id)
-    if session.exec(statement).first():
+    if (await session.exec(statement)).first():
         raise HTTPException(status_code=400, detail="username already taken")
     session.add(existing_user)
-    session.commit()
-    session.refresh(existing_user)
+    await session.commit()
+    await principal_cache.invalidate(existing_user.username)
+    await session.refresh(existing_user)
     return existing_user
 
 
+def chunk_boundary_query(user_id: int, chunk_size: int):
+    """Id of the owner's ``chunk_size``-th prompt; seeks ``ix_prompts_user_id``."""
+    return (
+        select(Prompts.id).where(Prompts.user_id == user_id)
+        .order_by(Prompts.id).offset(chunk_size - 1).limit(1)
+    )
+
+
+async def _delete_prompts_in_chunks(session: AsyncSession, user_id: int, chunk_size: int) -> None:
+    """Delete a large owner's prompts in committed id-ordered chunks.
+
+    Stops while fewer than ``chunk_size`` prompts remain, so ordinary users are
+    deleted in a single transaction and big ones never hold long row locks.
+    Each chunk takes its rows out of ``prompt_stats`` in the same transaction.
+    """
+    while True:
+        boundary = (await session.exec(chunk_boundary_query(user_id, chunk_size))).first()
+        if boundary is None:
+            return
+        conditions = (Prompts.user_id == user_id, Prompts.id <= boundary)
+        groups = (await session.exec(
+            select(Prompts.category, Prompts.model_name, func.count(), func.sum(Prompts.rate))
+            .where(*conditions)
+            .group_by(Prompts.category, Prompts.model_name)
+            .with_for_update()
+        )).all()
+        delta = StatsDelta()
+        for category, model_name, count, rate_sum in groups:
+            delta.add_group(user_id, category, model_name, -count, -rate_sum)
+        await session.exec(delete(Prompts).where(*conditions))
+        await apply_stats_delta(session, delta)
+        await session.commit()
+
+
 @router.delete("/{user_id}")
-def delete_user(user_id: int, session: Session = Depends(get_session),
+async def delete_user(user_id: int, session: AsyncSession = Depends(get_session),
                 current_user: dict = Depends(get_current_user)):
     try:
-        user = session.get(User, user_id)
+        user = await session.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found to delete")
-        session.delete(user)
-        session.commit()
+        # Detached so the loaded fields can still be returned after the commits.
+        session.expunge(user)
+        await _delete_prompts_in_chunks(session, user_id, config.DB_DELETE_CHUNK_SIZE)
+        # The last (or only) chunk goes in the same transaction as the user row.
+        await session.exec(delete(Prompts).where(Prompts.user_id == user_id))
+        await session.exec(delete(PromptStats).where(PromptStats.user_id == user_id))
+        await session.exec(delete(User).where(User.id == user_id))
+        await session.commit()
+        await principal_cache.invalidate(user.username)
+        await revocations.revoke_user(user.username)
     except HTTPException:
         raise
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting user: {str(e)}")
     return user
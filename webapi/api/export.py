@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+from typing import Awaitable, Callable, Literal
+
+from fastapi.responses import StreamingResponse
+
+from core import config
+
+ExportFormat = Literal["ndjson", "csv"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _encode(rows, export_format: ExportFormat) -> str:
+    if export_format == "ndjson":
+        return "".join(json.dumps(dict(row._mapping), default=str) + "\n" for row in rows)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def _iter_export(open_session: Callable[[], Awaitable], statement, columns: list[str],
+                       export_format: ExportFormat):
+    session = await open_session()
+    async with session:
+        if export_format == "csv":
+            yield _encode([columns], "csv")
+        # yield_per keeps one batch of rows in memory on a server-side cursor.
+        result = await session.stream(statement.execution_options(yield_per=config.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield _encode(rows, export_format)
+
+
+def export_response(open_session: Callable[[], Awaitable], statement, export_format: ExportFormat,
+                    filename: str) -> StreamingResponse:
+    """Stream every row of a column ``statement`` as NDJSON or CSV."""
+    columns = [column.name for column in statement.selected_columns]
+    return StreamingResponse(
+        _iter_export(open_session, statement, columns, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,51 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def cursor_id(cursor: Optional[str]) -> Optional[int]:
+    """Last id seen by the client, for ``WHERE id > :last_id ORDER BY id`` pages."""
+    if cursor is None:
+        return None
+    last_id = decode_cursor(cursor).get("id")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+def rank_cursor(cursor: Optional[str]) -> Optional[tuple[float, int]]:
+    """Last ``(rank, id)`` seen by the client, for relevance-ordered pages."""
+    if cursor is None:
+        return None
+    values = decode_cursor(cursor)
+    rank, last_id = values.get("rank"), values.get("id")
+    if not isinstance(rank, (int, float)) or isinstance(rank, bool) or not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return float(rank), last_id
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, keys: tuple[str, ...] = ("id",)) -> None:
+    """Advertise the next keyset page when this one came back full."""
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({key: getattr(rows[-1], key) for key in keys})
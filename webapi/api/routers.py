@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from .endpoints.v1 import auths, users, prompts, options
+from .endpoints.v1 import auths, users, prompts, options, admin
 
 api_router = APIRouter()
 api_router.include_router(auths.router, prefix="/auth", tags=["Auth"])
 api_router.include_router(prompts.router, prefix="/prompts", tags=["Prompts"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(options.router, prefix="/options", tags=["Options"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
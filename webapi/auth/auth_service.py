@@ -1,15 +1,24 @@
+import hashlib
 import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 
 import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from passlib.hash import sha256_crypt
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from auth.password_hasher import password_hasher
+from auth.principal_cache import principal_cache
+from auth.revocation import revocations
 from core import config
-from db.db_connection import get_session
+from db.db_connection import get_session, get_session_factory, release_connection
 from dotenv import load_dotenv
 from models.user import User
 
@@ -20,10 +29,18 @@ ALGORITHM = config.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = config.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
 
 
-def authenticate_user(username: str, password: str, session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.username == username)).first()
-    if not user or not sha256_crypt.verify(password, user.hashed_password):
+async def authenticate_user(username: str, password: str, session: AsyncSession = Depends(get_session)):
+    user = (await session.exec(select(User).where(User.username == username))).first()
+    if not user:
+        return None
+    await release_connection(session, user)
+    verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
     return user
 
 
@@ -38,8 +55,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 # Crear un token
 def crear_jwt(data: dict):
     payload = {
-        "exp": datetime.utcnow() + timedelta(hours=1),
+        "exp": datetime.utcnow() + timedelta(seconds=config.JWT_TOKEN_LIFETIME_SECONDS),
         "iat": datetime.utcnow(),
+        "jti": secrets.token_urlsafe(16),
         "data": data
     }
     token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
@@ -67,13 +85,68 @@ def validar_jwt(token: str):
         return None
 
 
-# Validar token puro (sin prefijo "Bearer")
-def validar_jwt_raw(token: str):
+class VerifiedTokenCache:
+    """Bounded LRU of already-verified tokens, keyed by SHA-256 digest and dropped at ``exp``."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Decoded payload of a cached token; callers must not mutate it."""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, payload: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload["exp"], payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+verified_tokens = VerifiedTokenCache(config.JWT_VERIFIED_CACHE_MAX_ENTRIES)
+
+
+def verified_payload(token: str) -> Optional[dict]:
+    """Full payload of a valid, unrevoked token, or ``None``."""
     try:
         if not token:
             return None
-        decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        return decoded["data"]
+        payload = verified_tokens.get(token)
+        if payload is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+            if "exp" in payload:
+                verified_tokens.put(token, payload)
+        if revocations.is_revoked(payload.get("jti"), payload["data"].get("sub"), payload.get("iat")):
+            return None
+        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
@@ -82,6 +155,12 @@ def validar_jwt_raw(token: str):
         return None
 
 
+# Validar token puro (sin prefijo "Bearer")
+def validar_jwt_raw(token: str):
+    payload = verified_payload(token)
+    return dict(payload["data"]) if payload else None
+
+
 # Esquema HTTPBearer — registra el Security Scheme en OpenAPI (/docs)
 bearer_scheme = HTTPBearer()
 
@@ -96,19 +175,65 @@ def get_current_user(
     return data
 
 
-def get_current_db_user(
+async def load_principal_user(username: str, session: AsyncSession) -> User:
+    user = await principal_cache.get(username)
+    if user is not None:
+        return user
+    return await _load_and_cache_user(username, session)
+
+
+async def _load_and_cache_user(username: str, session: AsyncSession) -> User:
+    user = (await session.exec(select(User).where(User.username == username))).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    await principal_cache.set(user)
+    return user
+
+
+async def get_current_db_user(
     current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ) -> User:
+    """Live user row of the caller; use when the handler needs more than id/username/role."""
     username = current_user.get("sub") if isinstance(current_user, dict) else None
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    user = session.exec(select(User).where(User.username == username)).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    return await load_principal_user(username, session)
 
-    return user
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """Caller identity taken from verified token claims, without touching the database."""
+
+    id: int
+    username: str
+    role: str
+
+
+async def get_token_principal(
+    current_user: dict = Depends(get_current_user),
+    open_session=Depends(get_session_factory),
+) -> TokenPrincipal:
+    """Claims-only tier: authorizes from ``sub``/``user_id``/``role`` in the token.
+
+    Tokens from ``crear_jwt`` at login carry all three. Older tokens missing any
+    of them fall back to the user row, so they keep working; only that path
+    opens a session.
+    """
+    username = current_user.get("sub") if isinstance(current_user, dict) else None
+    if not username:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    user_id, role = current_user.get("user_id"), current_user.get("role")
+    if isinstance(user_id, int) and isinstance(role, str):
+        return TokenPrincipal(id=user_id, username=username, role=role)
+
+    user = await principal_cache.get(username)
+    if user is None:
+        async with open_session() as session:
+            user = await _load_and_cache_user(username, session)
+    return TokenPrincipal(id=user.id, username=user.username, role=user.role)
 
 
 def require_admin_or_god(current_user: User = Depends(get_current_db_user)) -> User:
@@ -0,0 +1,262 @@
+"""Password hashing off the event loop.
+
+Passwords are hashed with a passlib ``CryptContext`` built from
+``PASSWORD_HASH_SCHEME`` (argon2, bcrypt or sha256_crypt) and
+``PASSWORD_HASH_ROUNDS``. Hashes made with another scheme or other rounds still
+verify and are upgraded on the next successful login. Pick rounds for this
+machine with::
+
+    python -m auth.password_hasher calibrate --scheme bcrypt --target-ms 250
+
+Hashing costs hundreds of milliseconds of CPU per call, so hashing and
+verification run in a dedicated ``ProcessPoolExecutor`` (``HASH_WORKERS``
+processes) instead of the shared threadpool, where they would hold the GIL and
+stall every other request. At most ``HASH_MAX_PENDING`` jobs may be running or
+queued; beyond that callers get a 503 with ``Retry-After`` rather than piling
+up behind a login storm. ``HASH_WORKERS=0`` falls back to the threadpool
+(useful for single-core deployments and debugging).
+
+Workers come from a ``forkserver`` (``spawn`` where that is unavailable), never
+from forking the threaded server process, and the pool is created by
+``main.lifespan``. If a worker dies the pool is replaced and the job retried
+once.
+"""
+import argparse
+import asyncio
+import logging
+import math
+import multiprocessing
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from core import config
+
+logger = logging.getLogger("webapi.auth")
+
+PASSWORD_SCHEMES = ("argon2", "bcrypt", "sha256_crypt")
+
+
+@lru_cache(maxsize=None)
+def build_context(scheme: str, rounds: Optional[int] = None) -> CryptContext:
+    """Hash with ``scheme``; other known schemes (and other rounds) verify but need an update."""
+    if scheme not in PASSWORD_SCHEMES:
+        raise ValueError(f"Unsupported password hash scheme {scheme!r}; expected one of {PASSWORD_SCHEMES}")
+    settings = {}
+    if rounds:
+        settings = {
+            f"{scheme}__default_rounds": rounds,
+            f"{scheme}__min_rounds": rounds,
+            f"{scheme}__max_rounds": rounds,
+        }
+    others = [other for other in PASSWORD_SCHEMES if other != scheme]
+    return CryptContext(schemes=[scheme, *others], default=scheme, deprecated="auto", **settings)
+
+
+# Module-level so they can be pickled into worker processes; each process builds
+# (and caches) its own context from the scheme and rounds passed in.
+def _hash(scheme: str, rounds: Optional[int], password: str) -> str:
+    return build_context(scheme, rounds).hash(password)
+
+
+def _verify(scheme: str, rounds: Optional[int], password: str, hashed_password: str) -> bool:
+    return build_context(scheme, rounds).verify(password, hashed_password)
+
+
+def _verify_and_update(
+    scheme: str, rounds: Optional[int], password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    return build_context(scheme, rounds).verify_and_update(password, hashed_password)
+
+
+def _worker_context():
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    # Workers fork from a server that already imported passlib and this module.
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        workers: int = 1,
+        max_pending: int = 8,
+        retry_after: int = 1,
+        scheme: str = "sha256_crypt",
+        rounds: Optional[int] = None,
+    ):
+        build_context(scheme, rounds)
+        self.scheme = scheme
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.rehashed = 0
+        self.restarts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """Verify ``password``; the second item is a replacement hash when the stored one is outdated."""
+        verified, new_hash = await self._run(_verify_and_update, password, hashed_password)
+        if new_hash:
+            self.rehashed += 1
+        return verified, new_hash
+
+    async def _run(self, function, *args):
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Password hashing is saturated, retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self.in_flight += 1
+        self.submitted += 1
+        args = (self.scheme, self.rounds, *args)
+        started = time.perf_counter()
+        try:
+            if self.workers > 0:
+                result = await self._run_in_pool(function, *args)
+            else:
+                result = await run_in_threadpool(function, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.completed += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        return result
+
+    async def _run_in_pool(self, function, *args):
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, function, *args)
+        except BrokenProcessPool as exc:
+            # A dead worker (OOM kill, segfault) breaks the pool for good.
+            logger.warning("Password hashing pool broken, replacing it: %s", exc)
+            self._replace_executor(executor)
+            return await loop.run_in_executor(self._get_executor(), function, *args)
+
+    def start(self) -> None:
+        """Create the worker pool; called from ``main.lifespan``, otherwise on first use."""
+        if self.workers > 0:
+            self._get_executor()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_worker_context())
+        return self._executor
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        # Concurrent jobs of the same pool all fail; only the first replaces it.
+        if self._executor is broken:
+            self._executor = None
+            self.restarts += 1
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self) -> dict:
+        return {
+            "scheme": self.scheme,
+            "rounds": self.rounds or build_context(self.scheme).handler(self.scheme).default_rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "rehashed": self.rehashed,
+            "restarts": self.restarts,
+            "avg_ms": round(self.total_ms / self.completed, 3) if self.completed else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    config.HASH_WORKERS,
+    config.HASH_MAX_PENDING,
+    config.HASH_RETRY_AFTER_SECONDS,
+    config.PASSWORD_HASH_SCHEME,
+    config.PASSWORD_HASH_ROUNDS,
+)
+
+
+def measure_verify_ms(scheme: str, rounds: int, samples: int = 3) -> float:
+    """Median wall time of one verify at ``rounds`` on this machine."""
+    context = build_context(scheme, rounds)
+    hashed_password = context.hash("calibration password")
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.verify("calibration password", hashed_password)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(scheme: str, target_ms: float, samples: int = 3) -> tuple[int, float]:
+    """Largest-cost rounds whose verify time lands near ``target_ms``; returns ``(rounds, ms)``."""
+    handler = build_context(scheme).handler(scheme)
+    rounds = handler.default_rounds
+    for _ in range(8):
+        elapsed = measure_verify_ms(scheme, rounds, samples)
+        if handler.rounds_cost == "log2":
+            candidate = rounds + math.floor(math.log2(target_ms / elapsed))
+        else:
+            candidate = int(rounds * target_ms / elapsed)
+        candidate = min(max(candidate, handler.min_rounds), handler.max_rounds)
+        if candidate == rounds:
+            break
+        rounds = candidate
+    return rounds, measure_verify_ms(scheme, rounds, samples)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Pick password hash rounds for a target verify latency.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = subcommands.add_parser("calibrate")
+    calibrate_parser.add_argument("--scheme", choices=PASSWORD_SCHEMES, default=config.PASSWORD_HASH_SCHEME)
+    calibrate_parser.add_argument("--target-ms", type=float, default=250.0)
+    calibrate_parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rounds, elapsed = calibrate(args.scheme, args.target_ms, args.samples)
+    print(f"# {args.scheme} verify takes {elapsed:.0f} ms at {rounds} rounds (target {args.target_ms:.0f} ms)")
+    print(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    print(f"PASSWORD_HASH_ROUNDS={rounds}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
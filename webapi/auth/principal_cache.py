@@ -0,0 +1,132 @@
+"""Two-tier cache of authenticated principals for ``get_current_db_user``.
+
+Tier one is a per-process TTL LRU (``PRINCIPAL_CACHE_TTL_SECONDS``,
+``PRINCIPAL_CACHE_MAX_ENTRIES``); tier two is Redis
+(``PRINCIPAL_CACHE_REDIS_TTL_SECONDS``), shared by all workers. Entries are
+keyed by username and hold the user's columns minus ``hashed_password``.
+Routes that change or delete a user call ``invalidate``, which clears this
+process and Redis; other processes may serve their local copy until its short
+TTL runs out. Redis errors are logged and treated as misses, and Redis is
+skipped for ``PRINCIPAL_CACHE_REDIS_RETRY_SECONDS`` afterwards.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from redis import Redis
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from core import config
+from db.redis_connection import shared_redis
+from models.user import User
+
+logger = logging.getLogger("webapi.auth")
+
+CACHED_FIELDS = ("id", "username", "name", "last_name", "email", "role")
+
+
+class PrincipalCache:
+    def __init__(
+        self,
+        ttl_seconds: float = 5.0,
+        max_entries: int = 10_000,
+        redis_factory: Optional[Callable[[], Redis]] = None,
+        redis_ttl_seconds: int = 300,
+        redis_retry_seconds: float = 30.0,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.redis_factory = redis_factory
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.redis_retry_seconds = redis_retry_seconds
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_down_until = 0.0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def redis_key(username: str) -> str:
+        return f"principal:{username}"
+
+    async def get(self, username: str) -> Optional[User]:
+        fields = self._get_local(username)
+        if fields is not None:
+            self.local_hits += 1
+            return User(**fields)
+        raw = await self._redis_call("get", self.redis_key(username))
+        if raw:
+            fields = json.loads(raw)
+            self._set_local(username, fields)
+            self.redis_hits += 1
+            return User(**fields)
+        self.misses += 1
+        return None
+
+    async def set(self, user: User) -> None:
+        fields = {name: getattr(user, name) for name in CACHED_FIELDS}
+        self._set_local(user.username, fields)
+        await self._redis_call("set", self.redis_key(user.username), json.dumps(fields), ex=self.redis_ttl_seconds)
+
+    async def invalidate(self, username: str) -> None:
+        with self._lock:
+            self._entries.pop(username, None)
+        await self._redis_call("delete", self.redis_key(username))
+
+    def clear(self) -> None:
+        """Drop every local entry and any Redis back-off."""
+        with self._lock:
+            self._entries.clear()
+        self._redis_down_until = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "redis_available": self.redis_factory is not None and time.monotonic() >= self._redis_down_until,
+        }
+
+    def _get_local(self, username: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            expires_at, fields = entry
+            if expires_at <= time.monotonic():
+                del self._entries[username]
+                return None
+            self._entries.move_to_end(username)
+            return fields
+
+    def _set_local(self, username: str, fields: dict) -> None:
+        with self._lock:
+            self._entries[username] = (time.monotonic() + self.ttl_seconds, fields)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _redis_call(self, method: str, *args, **kwargs):
+        if self.redis_factory is None or time.monotonic() < self._redis_down_until:
+            return None
+        try:
+            return await run_in_threadpool(getattr(self.redis_factory(), method), *args, **kwargs)
+        except (RedisError, OSError) as exc:
+            self._redis_down_until = time.monotonic() + self.redis_retry_seconds
+            logger.warning("Principal cache Redis tier unavailable for %ss: %s", self.redis_retry_seconds, exc)
+            return None
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=config.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=config.PRINCIPAL_CACHE_MAX_ENTRIES,
+    redis_factory=shared_redis if config.PRINCIPAL_CACHE_REDIS else None,
+    redis_ttl_seconds=config.PRINCIPAL_CACHE_REDIS_TTL_SECONDS,
+    redis_retry_seconds=config.PRINCIPAL_CACHE_REDIS_RETRY_SECONDS,
+)
@@ -0,0 +1,167 @@
+"""Sliding-window throttling of login and password-recovery attempts.
+
+Each attempt is recorded per client IP and per username before any password
+hashing or email work happens. An attempt is rejected with 429 and
+``Retry-After`` when more than ``AUTH_RATE_LIMIT_PER_IP`` /
+``AUTH_RATE_LIMIT_PER_USERNAME`` attempts fall within the last
+``AUTH_RATE_LIMIT_WINDOW_SECONDS``. Windows live in Redis sorted sets so all
+backend processes share them; when Redis is unavailable each process keeps
+its own windows in memory and retries Redis after
+``AUTH_RATE_LIMIT_REDIS_RETRY_SECONDS``.
+
+The client IP is the socket peer unless that peer is one of
+``TRUSTED_PROXIES``; then it is the right-most ``X-Forwarded-For`` hop that is
+not itself a trusted proxy, so clients cannot pick their own key by sending
+the header.
+"""
+import ipaddress
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request
+from redis import Redis
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from core import config
+from db.redis_connection import shared_redis
+
+logger = logging.getLogger("webapi.auth")
+
+
+class SlidingWindowLimiter:
+    def __init__(
+        self,
+        limit: int,
+        window_seconds: float,
+        redis_factory: Optional[Callable[[], Redis]] = None,
+        redis_retry_seconds: float = 30.0,
+    ):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.redis_factory = redis_factory
+        self.redis_retry_seconds = redis_retry_seconds
+        self._windows: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._redis_down_until = 0.0
+        self.rejected = 0
+
+    async def hit(self, key: str) -> float:
+        """Record an attempt; returns 0 when allowed, else seconds until one would be."""
+        if self.limit <= 0:
+            return 0.0
+        retry_after = None
+        if self.redis_factory is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                retry_after = await run_in_threadpool(self._hit_redis, key)
+            except (RedisError, OSError) as exc:
+                self._redis_down_until = time.monotonic() + self.redis_retry_seconds
+                logger.warning("Rate limiter using in-memory windows for %ss: %s", self.redis_retry_seconds, exc)
+        if retry_after is None:
+            retry_after = self._hit_memory(key)
+        if retry_after > 0:
+            self.rejected += 1
+        return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+        self._redis_down_until = 0.0
+
+    def _hit_memory(self, key: str) -> float:
+        now = time.time()
+        with self._lock:
+            window = self._windows.setdefault(key, deque())
+            while window and window[0] <= now - self.window_seconds:
+                window.popleft()
+            if len(window) >= self.limit:
+                return window[0] + self.window_seconds - now
+            window.append(now)
+            if len(self._windows) > 100_000:
+                self._prune(now)
+            return 0.0
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        self._windows = {key: window for key, window in self._windows.items() if window and window[-1] > cutoff}
+
+    def _hit_redis(self, key: str) -> float:
+        redis_key = f"ratelimit:{key}"
+        now = time.time()
+        member = f"{now}:{uuid.uuid4().hex}"
+        pipeline = self.redis_factory().pipeline(transaction=True)
+        pipeline.zremrangebyscore(redis_key, 0, now - self.window_seconds)
+        pipeline.zadd(redis_key, {member: now})
+        pipeline.zcard(redis_key)
+        pipeline.zrange(redis_key, 0, 0, withscores=True)
+        pipeline.expire(redis_key, math.ceil(self.window_seconds))
+        _, _, count, oldest, _ = pipeline.execute()
+        if count <= self.limit:
+            return 0.0
+        # Rejected attempts do not hold a slot in the window.
+        self.redis_factory().zrem(redis_key, member)
+        return max(oldest[0][1] + self.window_seconds - now, 0.001)
+
+
+def parse_networks(value: str) -> list:
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip()]
+
+
+trusted_proxies = parse_networks(config.TRUSTED_PROXIES)
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    hops = [
+        hop.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for hop in header.split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _limiter(limit: int) -> SlidingWindowLimiter:
+    return SlidingWindowLimiter(
+        limit,
+        config.AUTH_RATE_LIMIT_WINDOW_SECONDS,
+        redis_factory=shared_redis if config.AUTH_RATE_LIMIT_REDIS else None,
+        redis_retry_seconds=config.AUTH_RATE_LIMIT_REDIS_RETRY_SECONDS,
+    )
+
+
+ip_limiter = _limiter(config.AUTH_RATE_LIMIT_PER_IP)
+username_limiter = _limiter(config.AUTH_RATE_LIMIT_PER_USERNAME)
+
+
+async def enforce_auth_rate_limit(request: Request, action: str, username: str) -> None:
+    """Raise 429 when the caller's IP or the targeted username has too many recent ``action`` attempts."""
+    retry_after = max(
+        await ip_limiter.hit(f"{action}:ip:{client_ip(request)}"),
+        # Usernames compare case-insensitively under MariaDB collations.
+        await username_limiter.hit(f"{action}:user:{username.lower()}"),
+    )
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many attempts, retry later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
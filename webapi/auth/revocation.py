@@ -0,0 +1,161 @@
+"""Revocation of JWTs before their ``exp``.
+
+Two kinds of entries are kept: single tokens by ``jti`` (``POST /auth/logout``)
+and per-user cutoffs that reject every token issued up to a moment (password
+recovery, user deletion). Each process checks them in plain dicts on every
+request. New entries are written to Redis with a TTL that ends when the tokens
+they cover expire, and published on ``auth:revocations``; a listener thread in
+every process applies published entries and reloads all of them from Redis
+after (re)connecting. When Redis is down the process that revoked still
+enforces the entry and the error is logged.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from redis import Redis
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from core import config
+from db.redis_connection import shared_redis
+
+logger = logging.getLogger("webapi.auth")
+
+CHANNEL = "auth:revocations"
+KEY_PREFIX = "revoked:"
+
+
+class RevocationList:
+    def __init__(
+        self,
+        redis_factory: Optional[Callable[[], Redis]] = None,
+        max_token_seconds: int = 3600,
+        retry_seconds: float = 5.0,
+    ):
+        self.redis_factory = redis_factory
+        self.max_token_seconds = max_token_seconds
+        self.retry_seconds = retry_seconds
+        self._tokens: dict[str, float] = {}  # jti -> exp
+        self._users: dict[str, float] = {}  # username -> cutoff
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+
+    def is_revoked(self, jti: Optional[str], username: Optional[str], issued_at: Optional[float]) -> bool:
+        if jti is not None and jti in self._tokens:
+            return True
+        cutoff = self._users.get(username)
+        # iat has whole-second precision, so tokens issued in the same second as
+        # the cutoff are rejected too.
+        return cutoff is not None and (issued_at is None or issued_at < cutoff)
+
+    async def revoke_token(self, jti: str, expires_at: float) -> None:
+        self._add("jti", jti, expires_at)
+        ttl = int(expires_at - time.time()) + 1
+        if ttl > 0:
+            await run_in_threadpool(self._publish, "jti", jti, expires_at, ttl)
+
+    async def revoke_user(self, username: str) -> None:
+        """Reject every token of ``username`` issued up to now."""
+        cutoff = time.time()
+        self._add("user", username, cutoff)
+        await run_in_threadpool(self._publish, "user", username, cutoff, self.max_token_seconds + 1)
+
+    def apply_message(self, message: str) -> None:
+        """Apply a published ``"<kind> <timestamp> <name>"`` entry."""
+        kind, timestamp, name = message.split(" ", 2)
+        if kind not in ("jti", "user"):
+            raise ValueError(f"Unknown revocation kind {kind!r}")
+        self._add(kind, name, float(timestamp))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "listening": self._listener is not None and self._listener.is_alive(),
+        }
+
+    def _add(self, kind: str, name: str, timestamp: float) -> None:
+        with self._lock:
+            if kind == "jti":
+                self._tokens[name] = timestamp
+            else:
+                self._users[name] = max(timestamp, self._users.get(name, 0.0))
+            now = time.time()
+            if now >= self._next_prune:
+                self._prune(now)
+                self._next_prune = now + 60
+
+    def _prune(self, now: float) -> None:
+        # Tokens past exp fail verification anyway; cutoffs outlive the longest token.
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+        oldest = now - self.max_token_seconds
+        self._users = {name: cutoff for name, cutoff in self._users.items() if cutoff > oldest}
+
+    def _publish(self, kind: str, name: str, timestamp: float, ttl: int) -> None:
+        if self.redis_factory is None:
+            return
+        try:
+            redis = self.redis_factory()
+            redis.set(f"{KEY_PREFIX}{kind}:{name}", timestamp, ex=ttl)
+            redis.publish(CHANNEL, f"{kind} {timestamp} {name}")
+        except (RedisError, OSError) as exc:
+            logger.warning("Could not share %s revocation of %s through Redis: %s", kind, name, exc)
+
+    def load(self, redis: Redis) -> None:
+        for key in redis.scan_iter(match=f"{KEY_PREFIX}*"):
+            value = redis.get(key)
+            if value is None:
+                continue
+            kind, name = key[len(KEY_PREFIX):].split(":", 1)
+            self._add(kind, name, float(value))
+
+    def start_listener(self) -> None:
+        if self.redis_factory is None or self._listener is not None:
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, name="token-revocations", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        if self._listener is None:
+            return
+        self._stop.set()
+        self._listener.join(timeout=5)
+        self._listener = None
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            try:
+                redis = self.redis_factory()
+                pubsub = redis.pubsub(ignore_subscribe_messages=True)
+                try:
+                    pubsub.subscribe(CHANNEL)
+                    # Subscribe before loading so nothing published in between is missed.
+                    self.load(redis)
+                    while not self._stop.is_set():
+                        message = pubsub.get_message(timeout=1.0)
+                        if message is not None:
+                            try:
+                                self.apply_message(message["data"])
+                            except ValueError:
+                                logger.warning("Ignoring malformed revocation message %r", message["data"])
+                finally:
+                    pubsub.close()
+            except (RedisError, OSError) as exc:
+                logger.warning("Token revocation listener lost Redis, retrying in %ss: %s", self.retry_seconds, exc)
+                self._stop.wait(self.retry_seconds)
+
+
+revocations = RevocationList(
+    redis_factory=shared_redis if config.TOKEN_REVOCATION_REDIS else None,
+    max_token_seconds=config.JWT_TOKEN_LIFETIME_SECONDS,
+)
@@ -31,6 +31,14 @@ except ValidationError as e:
 JWT_SECRET_KEY = os.getenv("ENV_SECRET_KEY", "testkey")
 JWT_ALGORITHM = "HS256"
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Lifetime of the tokens issued at login.
+JWT_TOKEN_LIFETIME_SECONDS = int(os.getenv("JWT_TOKEN_LIFETIME_SECONDS", "3600"))
+# Share token revocations (logout, password recovery, user deletion) between
+# backend processes through Redis.
+TOKEN_REVOCATION_REDIS = os.getenv("TOKEN_REVOCATION_REDIS", "true").lower() == "true"
+# Verified bearer tokens kept in memory (until their exp) so repeats skip the
+# signature check; 0 disables the cache.
+JWT_VERIFIED_CACHE_MAX_ENTRIES = int(os.getenv("JWT_VERIFIED_CACHE_MAX_ENTRIES", "10000"))
 
 
 # Redis configuration
@@ -38,6 +46,13 @@ REDIS_HOST = os.getenv("REDIS_HOST", "127.0.0.1")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PSW = os.getenv("REDIS_PSW") or None
 REDIS_DECODE_RESP = True
+# The process-wide pools (db.redis_connection) open at most
+# REDIS_MAX_CONNECTIONS connections each, ping idle connections older than
+# REDIS_HEALTH_CHECK_INTERVAL seconds before reuse, and time out socket
+# connects/reads after REDIS_SOCKET_TIMEOUT seconds.
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1"))
 
 # MariaDB server
 # Ensure that the environment variable DB_URL is set to your MariaDB connection string
@@ -46,3 +61,127 @@ REDIS_DECODE_RESP = True
 DB_URL = os.getenv("DB_URL")
 if not DB_URL:
     DB_URL = "sqlite:///./crud_data.db"  # Default to SQLite if no environment variable is set
+
+# Embedded SQLite profile
+# Applies to file-based SQLite URLs (the default DB_URL). "embedded" enables
+# WAL with synchronous=NORMAL, a larger page cache, mmap I/O and a busy
+# timeout, funnels writes through a single pooled connection and serves
+# read-only routes from SQLITE_READER_POOL_SIZE query_only connections.
+# SQLITE_PROFILE=default keeps SQLite's stock settings and a shared pool.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "embedded").lower()
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_READER_POOL_SIZE = int(os.getenv("SQLITE_READER_POOL_SIZE", "4"))
+
+# Schema migrations
+# Startup compares the schema_version row with the latest migration. With
+# DB_AUTO_MIGRATE=false an outdated database fails fast instead of migrating;
+# apply migrations with `python -m db.migrations upgrade`.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true"
+
+# SQL logging
+# DB_ECHO=true prints every statement (debug only). In normal operation queries
+# slower than DB_SLOW_QUERY_MS are logged with redacted parameters and a
+# DB_QUERY_SAMPLE_RATE fraction of the rest is logged at INFO.
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_QUERY_SAMPLE_RATE = float(os.getenv("DB_QUERY_SAMPLE_RATE", "0.01"))
+
+# Connection pool sizing for server databases (and file-backed SQLite).
+# Keep DB_POOL_RECYCLE below MariaDB's wait_timeout so idle connections are
+# replaced before the server drops them; pre-ping catches the rest.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_USE_LIFO = os.getenv("DB_POOL_USE_LIFO", "false").lower() == "true"
+
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart."""
+    scheme, sep, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if backend in {"mariadb", "mysql"}:
+        return f"{backend}+asyncmy{sep}{rest}"
+    return url
+
+
+# Async database mode
+# DB_ASYNC=true serves requests through an AsyncSession on an asyncio driver
+# (aiosqlite for SQLite, asyncmy for MariaDB) instead of threadpool-bound sessions.
+# DB_ASYNC_URL overrides the URL derived from DB_URL.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+DB_ASYNC_URL = os.getenv("DB_ASYNC_URL") or to_async_url(DB_URL)
+
+# Read replicas
+# Comma-separated URLs served to read-only routes in round-robin order. A caller
+# that just wrote stays on the primary for DB_REPLICA_PIN_SECONDS; a replica that
+# fails to connect is skipped for DB_REPLICA_RETRY_SECONDS.
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_PIN_SECONDS = float(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+# User deletion
+# Owners with more prompts than this are deleted in committed chunks of this size.
+DB_DELETE_CHUNK_SIZE = int(os.getenv("DB_DELETE_CHUNK_SIZE", "1000"))
+
+# Group commit
+# PROMPTS_GROUP_COMMIT=true makes POST /prompts hand rows to a shared writer
+# that commits everything arriving within PROMPTS_GROUP_COMMIT_DELAY_MS (up to
+# PROMPTS_GROUP_COMMIT_MAX_BATCH rows) as one multi-row transaction.
+PROMPTS_GROUP_COMMIT = os.getenv("PROMPTS_GROUP_COMMIT", "false").lower() == "true"
+PROMPTS_GROUP_COMMIT_DELAY_MS = float(os.getenv("PROMPTS_GROUP_COMMIT_DELAY_MS", "5"))
+PROMPTS_GROUP_COMMIT_MAX_BATCH = int(os.getenv("PROMPTS_GROUP_COMMIT_MAX_BATCH", "500"))
+
+# Password hashing
+# New passwords are hashed with PASSWORD_HASH_SCHEME (argon2, bcrypt or
+# sha256_crypt) at PASSWORD_HASH_ROUNDS (scheme default when unset); older
+# hashes are upgraded on login. `python -m auth.password_hasher calibrate`
+# suggests rounds for a target verify latency.
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "sha256_crypt")
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS") or 0) or None
+# Hashes/verifications run in HASH_WORKERS processes (0 = threadpool). Once
+# HASH_MAX_PENDING jobs are running or queued, callers get a 503 with
+# Retry-After: HASH_RETRY_AFTER_SECONDS.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(max(HASH_WORKERS, 1) * 8)))
+HASH_RETRY_AFTER_SECONDS = int(os.getenv("HASH_RETRY_AFTER_SECONDS", "1"))
+
+# Login/recovery throttling
+# At most AUTH_RATE_LIMIT_PER_IP attempts per client IP and
+# AUTH_RATE_LIMIT_PER_USERNAME per username within the sliding
+# AUTH_RATE_LIMIT_WINDOW_SECONDS (0 disables a limit). Windows are shared through
+# Redis when AUTH_RATE_LIMIT_REDIS=true, falling back to per-process memory for
+# AUTH_RATE_LIMIT_REDIS_RETRY_SECONDS after a Redis error.
+AUTH_RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("AUTH_RATE_LIMIT_WINDOW_SECONDS", "60"))
+AUTH_RATE_LIMIT_PER_IP = int(os.getenv("AUTH_RATE_LIMIT_PER_IP", "30"))
+AUTH_RATE_LIMIT_PER_USERNAME = int(os.getenv("AUTH_RATE_LIMIT_PER_USERNAME", "10"))
+AUTH_RATE_LIMIT_REDIS = os.getenv("AUTH_RATE_LIMIT_REDIS", "true").lower() == "true"
+AUTH_RATE_LIMIT_REDIS_RETRY_SECONDS = float(os.getenv("AUTH_RATE_LIMIT_REDIS_RETRY_SECONDS", "30"))
+# Comma-separated proxy IPs/CIDRs whose X-Forwarded-For is believed when
+# resolving the client IP for rate limits; empty uses the socket peer.
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+
+# Principal cache
+# get_current_db_user caches users per process for PRINCIPAL_CACHE_TTL_SECONDS
+# (up to PRINCIPAL_CACHE_MAX_ENTRIES) and, with PRINCIPAL_CACHE_REDIS=true, in
+# Redis for PRINCIPAL_CACHE_REDIS_TTL_SECONDS. After a Redis error the Redis tier
+# is skipped for PRINCIPAL_CACHE_REDIS_RETRY_SECONDS.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "5"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_CACHE_REDIS = os.getenv("PRINCIPAL_CACHE_REDIS", "true").lower() == "true"
+PRINCIPAL_CACHE_REDIS_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_REDIS_TTL_SECONDS", "300"))
+PRINCIPAL_CACHE_REDIS_RETRY_SECONDS = float(os.getenv("PRINCIPAL_CACHE_REDIS_RETRY_SECONDS", "30"))
+
+# Bulk prompt import
+# Rows per multi-row INSERT/transaction in POST /prompts/bulk.
+PROMPTS_BULK_BATCH_SIZE = int(os.getenv("PROMPTS_BULK_BATCH_SIZE", "1000"))
+
+# Streaming exports
+# Rows fetched per server-side cursor round trip in the /export endpoints.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
@@ -1,15 +1,251 @@
-from sqlmodel import SQLModel, create_engine, Session
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from core import config
-# from sqlalchemy.ext.asyncio import AsyncSession
+from db.group_commit import PromptGroupCommitter
+from db.migrations import ensure_schema
+from db.pool_stats import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from db.query_stats import query_stats
+from db.replicas import Replica, ReplicaRouter, principal_key
+from db.sqlite_profile import apply_pragmas, embedded_profile_enabled, profile_pragmas
+from db.threaded_session import ThreadedSession
 
-connect_args = {"check_same_thread": False}
-engine = create_engine(config.DB_URL, echo=True)
 
-# Actually create the tables in the database
-# If using SQLite, the database file will be created in the current directory
-SQLModel.metadata.create_all(engine)
+def engine_options(url: str, is_async: bool = False, sqlite_reader: bool = False) -> dict:
+    """Pool and driver keyword arguments for create_engine/create_async_engine."""
+    parsed = make_url(url)
+    options = {}
+    if parsed.get_backend_name() == "sqlite":
+        if parsed.database in (None, "", ":memory:"):
+            # In-memory SQLite keeps its default per-thread pool.
+            return options
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        pool_use_lifo=config.DB_POOL_USE_LIFO,
+    )
+    if embedded_profile_enabled(url):
+        # One writer connection; concurrent writers queue in the pool instead
+        # of retrying on SQLITE_BUSY. Readers get their own fixed pool.
+        options.update(
+            pool_size=config.SQLITE_READER_POOL_SIZE if sqlite_reader else 1,
+            max_overflow=0,
+            pool_pre_ping=False,
+        )
+    return options
 
 
-def get_session():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+def _profiled(new_engine, url: str, sqlite_reader: bool = False):
+    if embedded_profile_enabled(url):
+        apply_pragmas(getattr(new_engine, "sync_engine", new_engine), profile_pragmas(query_only=sqlite_reader))
+    return new_engine
+
+
+def build_engine(url: str, sqlite_reader: bool = False):
+    return _profiled(
+        create_engine(url, echo=config.DB_ECHO, **engine_options(url, sqlite_reader=sqlite_reader)),
+        url,
+        sqlite_reader,
+    )
+
+
+def build_async_engine(async_url: str, sqlite_reader: bool = False):
+    # Imported lazily so the asyncio drivers (aiosqlite / asyncmy) stay optional
+    # for the default sync deployment.
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    try:
+        async_engine_ = create_async_engine(
+            async_url, echo=config.DB_ECHO, **engine_options(async_url, is_async=True, sqlite_reader=sqlite_reader)
+        )
+    except ImportError as exc:
+        driver = make_url(async_url).drivername
+        raise RuntimeError(
+            f"DB_ASYNC=true needs the {driver} driver ({exc}); install it with `pip install -r requirements.txt`"
+        ) from exc
+    return _profiled(async_engine_, async_url, sqlite_reader)
+
+
+def _build_replicas() -> list:
+    replicas = [
+        Replica(
+            name=f"replica_{index}",
+            engine=build_engine(url),
+            async_engine=build_async_engine(config.to_async_url(url)) if config.DB_ASYNC else None,
+        )
+        for index, url in enumerate(config.DB_REPLICA_URLS)
+    ]
+    if not replicas and embedded_profile_enabled(config.DB_URL) and config.SQLITE_READER_POOL_SIZE > 0:
+        replicas.append(
+            Replica(
+                name="sqlite_reader",
+                engine=build_engine(config.DB_URL, sqlite_reader=True),
+                async_engine=build_async_engine(config.DB_ASYNC_URL, sqlite_reader=True) if config.DB_ASYNC else None,
+            )
+        )
+    return replicas
+
+
+engine = build_engine(config.DB_URL)
+
+async_engine = None
+if config.DB_ASYNC:
+    async_engine = build_async_engine(config.DB_ASYNC_URL)
+
+replica_router = ReplicaRouter(
+    _build_replicas(),
+    # WAL readers of the local SQLite file see every commit immediately, so
+    # only real replicas need read-your-writes pinning.
+    pin_seconds=config.DB_REPLICA_PIN_SECONDS if config.DB_REPLICA_URLS else 0,
+    retry_seconds=config.DB_REPLICA_RETRY_SECONDS,
+)
+
+
+prompt_committer = None
+if config.PROMPTS_GROUP_COMMIT:
+    prompt_committer = PromptGroupCommitter(
+        engine,
+        async_engine,
+        delay_ms=config.PROMPTS_GROUP_COMMIT_DELAY_MS,
+        max_batch=config.PROMPTS_GROUP_COMMIT_MAX_BATCH,
+    )
+
+
+def get_prompt_committer():
+    """The shared group committer, or None when PROMPTS_GROUP_COMMIT is off."""
+    return prompt_committer
+
+
+_schema_ready = False
+
+
+def ensure_primary_schema() -> None:
+    """Verify the primary schema version once per process (see db.migrations).
+
+    If using SQLite, the database file is created in the current directory.
+    """
+    global _schema_ready
+    if not _schema_ready:
+        ensure_schema(engine, auto_migrate=config.DB_AUTO_MIGRATE)
+        _schema_ready = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _mark_committed(session):
+    session.info["committed"] = True
+
+
+def engines() -> dict:
+    """Named engines, instrumented for query stats and reported on the admin surface."""
+    named = {"primary": engine}
+    if async_engine is not None:
+        named["primary_async"] = async_engine.sync_engine
+    for replica in replica_router.replicas:
+        named[replica.name] = replica.engine
+        if replica.async_engine is not None:
+            named[f"{replica.name}_async"] = replica.async_engine.sync_engine
+    return named
+
+
+for _engine in engines().values():
+    query_stats.attach(_engine)
+
+
+def _new_session(sync_engine, async_engine_=None):
+    if async_engine_ is not None:
+        return AsyncSession(async_engine_, expire_on_commit=False)
+    return ThreadedSession(Session(sync_engine, expire_on_commit=False))
+
+
+async def release_connection(session, *instances) -> None:
+    """End the session's transaction so its pooled connection is free while the
+    request awaits non-database work (password hashing, email).
+
+    The embedded SQLite writer pool has a single connection, so holding it
+    across such an await stalls every other write. ``instances`` are detached
+    first so the rollback keeps their loaded fields; ``session.add`` them again
+    before changing them.
+    """
+    for instance in instances:
+        session.expunge(instance)
+    await session.rollback()
+
+
+async def get_session(request: Request):
+    """Yield a primary session with the AsyncSession API for the configured mode."""
+    if not _schema_ready:
+        await run_in_threadpool(ensure_primary_schema)
+    async with _new_session(engine, async_engine) as session:
+        try:
+            yield session
+        finally:
+            if session.sync_session.info.get("committed"):
+                replica_router.pin(principal_key(request))
+
+
+async def get_session_factory():
+    """Return a callable that opens a primary session, for dependencies that
+    only sometimes need the database; the caller closes what it opens."""
+    if not _schema_ready:
+        await run_in_threadpool(ensure_primary_schema)
+    return open_primary_session
+
+
+def open_primary_session():
+    return _new_session(engine, async_engine)
+
+
+async def _connect_replica(principal):
+    for replica in replica_router.candidates(principal):
+        session = _new_session(replica.engine, replica.async_engine)
+        try:
+            await session.connection()
+        except DBAPIError:
+            await session.close()
+            replica_router.mark_down(replica)
+            continue
+        return session
+    return None
+
+
+async def get_read_session(request: Request):
+    """Yield a session for read-only routes, preferring a healthy replica.
+
+    Falls back to the primary when no replica is configured or reachable, or
+    when the caller committed a write within DB_REPLICA_PIN_SECONDS.
+    """
+    if not _schema_ready:
+        await run_in_threadpool(ensure_primary_schema)
+    session = await _connect_replica(principal_key(request))
+    if session is None:
+        session = _new_session(engine, async_engine)
+    async with session:
+        yield session
+
+
+async def get_stream_session_factory(request: Request):
+    """Return a coroutine that opens a read session owned by a streamed response.
+
+    Dependency sessions are closed before a ``StreamingResponse`` body is sent,
+    so export routes open (and close) their own session inside the body.
+    """
+    if not _schema_ready:
+        await run_in_threadpool(ensure_primary_schema)
+    principal = principal_key(request)
+
+    async def open_session():
+        session = await _connect_replica(principal)
+        return session if session is not None else _new_session(engine, async_engine)
+
+    return open_session
@@ -0,0 +1,41 @@
+"""Full-text search over ``prompts.prompt_text``.
+
+SQLite uses an FTS5 external-content table (``prompts_fts``) kept in sync with
+``prompts`` by triggers; MariaDB uses a FULLTEXT index. Both are created by
+schema migration 3 in ``db.migrations``. ``search_rank`` returns a relevance
+expression where lower is better, so callers can order and keyset-paginate on
+``(rank, id)``.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, table
+from sqlalchemy.dialects.mysql import match
+
+from db.migrations import MYSQL_DIALECTS
+from models.prompts import Prompts
+
+prompts_fts = table("prompts_fts", column("rowid"), column("prompt_text"))
+
+
+def search_terms(query: str) -> list[str]:
+    """Words of a user query; operators and quotes are dropped so input can never be malformed."""
+    return re.findall(r"\w+", query)
+
+
+def search_rank(statement, dialect_name: str, terms: list[str]) -> Optional[tuple]:
+    """Restrict ``statement`` to prompts matching every term and return ``(statement, rank)``.
+
+    Returns ``None`` when the database has no full-text support.
+    """
+    if dialect_name == "sqlite":
+        fts_query = " ".join(f'"{term}"' for term in terms)
+        statement = statement.join(prompts_fts, prompts_fts.c.rowid == Prompts.id).where(
+            literal_column("prompts_fts").op("MATCH")(fts_query)
+        )
+        # bm25() is negative; more relevant rows sort first.
+        return statement, func.bm25(literal_column("prompts_fts"))
+    if dialect_name in MYSQL_DIALECTS:
+        relevance = match(Prompts.prompt_text, against=" ".join(f"+{term}" for term in terms)).in_boolean_mode()
+        return statement.where(relevance > 0), -relevance
+    return None
@@ -0,0 +1,86 @@
+"""Group commit for prompt inserts.
+
+Concurrent ``create_prompt`` calls hand their row to a ``PromptGroupCommitter``
+instead of committing individually. Rows arriving within
+``PROMPTS_GROUP_COMMIT_DELAY_MS`` of the first one (or until
+``PROMPTS_GROUP_COMMIT_MAX_BATCH`` rows are waiting) are inserted with one
+multi-row ``INSERT ... RETURNING`` and one commit, so a burst pays for a
+single fsync. Each caller's awaitable resolves with its own prompt id.
+"""
+import asyncio
+from typing import Optional
+
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+
+from db.prompt_stats import StatsDelta, apply_rows
+from models.prompts import Prompts
+
+
+class PromptGroupCommitter:
+    def __init__(self, engine, async_engine=None, delay_ms: float = 5.0, max_batch: int = 500):
+        self.engine = engine
+        self.async_engine = async_engine
+        self.delay = delay_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, row: dict) -> int:
+        """Queue a prompt row and wait until its batch is committed; returns the new id."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._commit(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _commit(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        rows = [row for row, _ in batch]
+        try:
+            if self.async_engine is not None:
+                async with self.async_engine.begin() as connection:
+                    ids = await connection.run_sync(_insert_batch, rows)
+            else:
+                ids = await run_in_threadpool(self._commit_sync, rows)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        self.rows += len(rows)
+        for (_, future), prompt_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(prompt_id)
+
+    def _commit_sync(self, rows: list[dict]) -> list[int]:
+        with self.engine.begin() as connection:
+            return _insert_batch(connection, rows)
+
+
+def _insert_batch(connection, rows: list[dict]) -> list[int]:
+    """Insert ``rows`` and their prompt_stats deltas; ids come back in row order."""
+    ids = connection.execute(
+        insert(Prompts).returning(Prompts.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    delta = StatsDelta()
+    for row in rows:
+        delta.add(row["user_id"], row["category"], row["model_name"], row["rate"])
+    apply_rows(connection, delta.rows())
+    return ids
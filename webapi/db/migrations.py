@@ -0,0 +1,186 @@
+"""Versioned schema migrations.
+
+Each migration runs once and bumps the single row in ``schema_version``. Worker
+startup only reads that row (``ensure_schema``), so boot cost does not depend
+on how many tables or indexes exist. Apply pending migrations explicitly with::
+
+    python -m db.migrations upgrade
+"""
+import sys
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy import Column, Integer, MetaData, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import SQLModel
+
+from models.prompt_stats import PromptStats
+from models.prompts import PROMPTS_INDEXES, Prompts
+from models.user import User
+
+MYSQL_DIALECTS = {"mysql", "mariadb"}
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def index_ddl(dialect_name: str, name: str, table: str, columns: list[str]) -> str:
+    """CREATE INDEX that does not block writes on MariaDB (online DDL)."""
+    ddl = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    if dialect_name in MYSQL_DIALECTS:
+        ddl += " ALGORITHM=INPLACE LOCK=NONE"
+    return ddl
+
+
+def create_index_online(connection: Connection, name: str, table: str, columns: list[str]) -> None:
+    connection.execute(text(index_ddl(connection.dialect.name, name, table, columns)))
+
+
+def _create_base_tables(connection: Connection) -> None:
+    # checkfirst keeps this a no-op for databases created by the old create_all.
+    SQLModel.metadata.create_all(connection, tables=[User.__table__, Prompts.__table__])
+
+
+def _create_prompts_filter_indexes(connection: Connection) -> None:
+    for name, columns in PROMPTS_INDEXES.items():
+        create_index_online(connection, name, "prompts", columns)
+
+
+# External-content FTS5 table: stores only the index, kept in sync by triggers.
+_SQLITE_PROMPTS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts
+       USING fts5(prompt_text, content='prompts', content_rowid='id')""",
+    """CREATE TRIGGER IF NOT EXISTS prompts_fts_ai AFTER INSERT ON prompts BEGIN
+         INSERT INTO prompts_fts(rowid, prompt_text) VALUES (new.id, new.prompt_text);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS prompts_fts_ad AFTER DELETE ON prompts BEGIN
+         INSERT INTO prompts_fts(prompts_fts, rowid, prompt_text) VALUES ('delete', old.id, old.prompt_text);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS prompts_fts_au AFTER UPDATE OF prompt_text ON prompts BEGIN
+         INSERT INTO prompts_fts(prompts_fts, rowid, prompt_text) VALUES ('delete', old.id, old.prompt_text);
+         INSERT INTO prompts_fts(rowid, prompt_text) VALUES (new.id, new.prompt_text);
+       END""",
+    # Index rows that existed before the migration.
+    "INSERT INTO prompts_fts(prompts_fts) VALUES ('rebuild')",
+]
+
+
+def _create_prompts_fulltext_index(connection: Connection) -> None:
+    dialect_name = connection.dialect.name
+    if dialect_name == "sqlite":
+        for ddl in _SQLITE_PROMPTS_FTS_DDL:
+            connection.execute(text(ddl))
+    elif dialect_name in MYSQL_DIALECTS:
+        connection.execute(text("CREATE FULLTEXT INDEX IF NOT EXISTS ft_prompts_prompt_text ON prompts (prompt_text)"))
+
+
+def _create_prompt_stats(connection: Connection) -> None:
+    from db.prompt_stats import rebuild
+
+    SQLModel.metadata.create_all(connection, tables=[PromptStats.__table__])
+    rebuild(connection)
+
+
+def _create_prompts_owner_index(connection: Connection) -> None:
+    create_index_online(connection, "ix_prompts_user_id", "prompts", PROMPTS_INDEXES["ix_prompts_user_id"])
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "create user and prompts tables", _create_base_tables),
+    Migration(2, "add composite indexes for prompt filters", _create_prompts_filter_indexes),
+    Migration(3, "add full-text index on prompt_text", _create_prompts_fulltext_index),
+    Migration(4, "add prompt_stats summary table", _create_prompt_stats),
+    Migration(5, "add (user_id, id) index for chunked prompt deletes", _create_prompts_owner_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(engine: Engine) -> int:
+    """Read the schema version row; 0 means the database was never migrated."""
+    try:
+        with engine.connect() as connection:
+            version = connection.execute(
+                select(schema_version.c.version).where(schema_version.c.id == 1)
+            ).scalar()
+    except DBAPIError:
+        return 0
+    return version or 0
+
+
+def _set_version(connection: Connection, version: int) -> None:
+    updated = connection.execute(
+        schema_version.update().where(schema_version.c.id == 1).values(version=version)
+    )
+    if updated.rowcount == 0:
+        connection.execute(schema_version.insert().values(id=1, version=version))
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> int:
+    """Apply pending migrations up to ``target`` (default: latest) and return the version."""
+    target = LATEST_VERSION if target is None else target
+    with engine.connect() as connection:
+        locked = connection.dialect.name in MYSQL_DIALECTS
+        if locked:
+            # Serialize concurrent worker boots on MariaDB.
+            connection.execute(text("SELECT GET_LOCK('webapi_schema_migrations', 60)"))
+        try:
+            _version_metadata.create_all(connection)
+            connection.commit()
+            version = connection.execute(
+                select(schema_version.c.version).where(schema_version.c.id == 1)
+            ).scalar() or 0
+            for migration in MIGRATIONS:
+                if version < migration.version <= target:
+                    migration.upgrade(connection)
+                    _set_version(connection, migration.version)
+                    connection.commit()
+                    version = migration.version
+        finally:
+            if locked:
+                connection.execute(text("SELECT RELEASE_LOCK('webapi_schema_migrations')"))
+    return version
+
+
+def ensure_schema(engine: Engine, auto_migrate: bool = True) -> int:
+    """Startup check: one version read, migrating only when the database is behind."""
+    version = current_version(engine)
+    if version >= LATEST_VERSION:
+        return version
+    if not auto_migrate:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}. "
+            "Run `python -m db.migrations upgrade`."
+        )
+    return upgrade(engine)
+
+
+def main(argv: list[str]) -> int:
+    from db.db_connection import engine
+
+    command = argv[0] if argv else "upgrade"
+    if command == "upgrade":
+        print(f"Schema version: {upgrade(engine)}")
+    elif command == "current":
+        print(f"Schema version: {current_version(engine)} (latest {LATEST_VERSION})")
+    else:
+        print("usage: python -m db.migrations [upgrade|current]")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
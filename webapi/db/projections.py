@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from sqlmodel import SQLModel, select
+
+
+def columns_for(model: type[SQLModel], schema: type[BaseModel]) -> list:
+    """Mapped column attributes of ``model`` that ``schema`` serializes, in schema order.
+
+    Schema fields without a matching column (e.g. nested relationships) are
+    skipped, so they must be loaded separately.
+    """
+    table_columns = model.__table__.columns
+    return [getattr(model, name) for name in schema.model_fields if name in table_columns]
+
+
+def select_columns(model: type[SQLModel], schema: type[BaseModel]):
+    """``SELECT`` only the columns ``schema`` needs.
+
+    Results are lightweight ``Row`` objects instead of ORM entities: no identity
+    map, no change tracking and no unused columns (such as ``hashed_password``)
+    on the wire. Response models read them through ``from_attributes``.
+    """
+    return select(*columns_for(model, schema))
@@ -0,0 +1,151 @@
+"""Incremental maintenance of the ``prompt_stats`` summary table.
+
+Prompt writes collect ``(user_id, category, model_name)`` deltas in a
+``StatsDelta`` and apply them with one upsert before committing, so the summary
+always moves in the same transaction as ``prompts``. Backends without a native
+upsert (anything but SQLite, PostgreSQL and MySQL/MariaDB) update each group
+and insert the missing ones instead. Reconcile with::
+
+    python -m db.prompt_stats rebuild
+"""
+import sys
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+
+from db.migrations import MYSQL_DIALECTS
+from models.prompt_stats import PromptStats
+from models.prompts import Prompts
+
+stats_table = PromptStats.__table__
+NATIVE_UPSERT_DIALECTS = {"sqlite", "postgresql", *MYSQL_DIALECTS}
+
+
+class StatsDelta:
+    """Pending count/rate changes per summary group."""
+
+    def __init__(self):
+        self._changes: dict[tuple, list[int]] = defaultdict(lambda: [0, 0])
+
+    def add(self, user_id: int, category: str, model_name: str, rate: int, sign: int = 1) -> None:
+        self.add_group(user_id, category, model_name, sign, sign * rate)
+
+    def add_group(self, user_id: int, category: str, model_name: str, count: int, rate_sum: int) -> None:
+        change = self._changes[(user_id, category, model_name)]
+        change[0] += count
+        change[1] += rate_sum
+
+    def add_prompt(self, prompt, sign: int = 1) -> None:
+        self.add(prompt.user_id, prompt.category, prompt.model_name, prompt.rate, sign)
+
+    def rows(self) -> list[dict]:
+        # Sorted so concurrent transactions lock groups in the same order.
+        return [
+            {"user_id": key[0], "category": key[1], "model_name": key[2], "prompt_count": count, "rate_sum": rate_sum}
+            for key, (count, rate_sum) in sorted(self._changes.items())
+            if count or rate_sum
+        ]
+
+
+def upsert_statement(dialect_name: str, rows: list[dict]):
+    """Multi-row ``INSERT`` that adds to existing groups instead of failing."""
+    if dialect_name in ("sqlite", "postgresql"):
+        dialect = sqlite if dialect_name == "sqlite" else postgresql
+        statement = dialect.insert(stats_table).values(rows)
+        added = statement.excluded
+        return statement.on_conflict_do_update(
+            index_elements=[stats_table.c.user_id, stats_table.c.category, stats_table.c.model_name],
+            set_={
+                "prompt_count": stats_table.c.prompt_count + added.prompt_count,
+                "rate_sum": stats_table.c.rate_sum + added.rate_sum,
+            },
+        )
+    if dialect_name in MYSQL_DIALECTS:
+        statement = mysql.insert(stats_table).values(rows)
+        added = statement.inserted
+        return statement.on_duplicate_key_update(
+            prompt_count=stats_table.c.prompt_count + added.prompt_count,
+            rate_sum=stats_table.c.rate_sum + added.rate_sum,
+        )
+    raise ValueError(f"{dialect_name} has no native upsert; use apply_rows")
+
+
+def _add_to_group(connection: Connection, row: dict) -> int:
+    return connection.execute(
+        update(stats_table)
+        .where(
+            stats_table.c.user_id == row["user_id"],
+            stats_table.c.category == row["category"],
+            stats_table.c.model_name == row["model_name"],
+        )
+        .values(
+            prompt_count=stats_table.c.prompt_count + row["prompt_count"],
+            rate_sum=stats_table.c.rate_sum + row["rate_sum"],
+        )
+    ).rowcount
+
+
+def apply_rows(connection: Connection, rows: list[dict]) -> None:
+    """Add ``rows`` to the summary in ``connection``'s current transaction."""
+    if not rows:
+        return
+    if connection.dialect.name in NATIVE_UPSERT_DIALECTS:
+        connection.execute(upsert_statement(connection.dialect.name, rows))
+        return
+    for row in rows:
+        if _add_to_group(connection, row):
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(stats_table).values(row))
+        except IntegrityError:
+            # Another transaction created the group since the UPDATE.
+            _add_to_group(connection, row)
+
+
+async def apply_stats_delta(session, delta: StatsDelta) -> None:
+    """Queue the summary update in the session's current transaction."""
+    rows = delta.rows()
+    if not rows:
+        return
+    dialect_name = session.sync_session.get_bind().dialect.name
+    if dialect_name in NATIVE_UPSERT_DIALECTS:
+        await session.exec(upsert_statement(dialect_name, rows))
+    else:
+        await session.run_sync(lambda sync_session: apply_rows(sync_session.connection(), rows))
+
+
+def rebuild(connection: Connection) -> int:
+    """Recompute the whole summary from ``prompts``; returns the number of groups."""
+    connection.execute(delete(stats_table))
+    grouped = select(
+        Prompts.user_id,
+        Prompts.category,
+        Prompts.model_name,
+        func.count(),
+        func.coalesce(func.sum(Prompts.rate), 0),
+    ).group_by(Prompts.user_id, Prompts.category, Prompts.model_name)
+    connection.execute(
+        insert(stats_table).from_select(
+            ["user_id", "category", "model_name", "prompt_count", "rate_sum"], grouped
+        )
+    )
+    return connection.execute(select(func.count()).select_from(stats_table)).scalar_one()
+
+
+def main(argv: list[str]) -> int:
+    from db.db_connection import engine
+
+    if argv[:1] != ["rebuild"]:
+        print("usage: python -m db.prompt_stats rebuild")
+        return 2
+    with engine.begin() as connection:
+        print(f"Rebuilt prompt_stats: {rebuild(connection)} groups")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
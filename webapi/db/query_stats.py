@@ -0,0 +1,124 @@
+import logging
+import random
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+from core import config
+
+logger = logging.getLogger("webapi.sql")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_OVERFLOW_FINGERPRINT = "<other statements>"
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so executions differing only in values share stats."""
+    normalized = statement.replace("%s", "?")
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?+)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def redact(parameters, executemany: bool = False):
+    """Describe bound parameters by type only so values never reach the logs."""
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return "<redacted>"
+
+
+class QueryStats:
+    """Per-fingerprint timing aggregated from SQLAlchemy cursor events.
+
+    Statements slower than ``slow_ms`` are logged as warnings with redacted
+    parameters; a ``sample_rate`` fraction of the remaining ones is logged at
+    INFO. Aggregates are capped at ``max_fingerprints`` distinct statements.
+    """
+
+    def __init__(self, slow_ms: float, sample_rate: float, max_fingerprints: int = 500):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def attach(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        key = fingerprint(statement)
+        is_slow = elapsed_ms >= self.slow_ms
+        self.record(key, elapsed_ms, is_slow)
+        if is_slow:
+            logger.warning(
+                "slow query %.1fms: %s params=%s", elapsed_ms, key, redact(parameters, executemany)
+            )
+        elif self.sample_rate and random.random() < self.sample_rate:
+            logger.info("sampled query %.1fms: %s", elapsed_ms, key)
+
+    def _handle_error(self, exception_context):
+        # after_cursor_execute never fires for a failed statement; drop its start
+        # time so the connection's stack does not grow for as long as it is pooled.
+        connection = exception_context.connection
+        if connection is not None and not connection.invalidated:
+            started = connection.info.get("query_started")
+            if started:
+                started.pop()
+
+    def record(self, key: str, elapsed_ms: float, is_slow: bool = False) -> None:
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = _OVERFLOW_FINGERPRINT
+                    entry = self._stats.get(key)
+                if entry is None:
+                    entry = self._stats[key] = {"count": 0, "slow": 0, "total_ms": 0.0, "max_ms": 0.0}
+            entry["count"] += 1
+            entry["slow"] += int(is_slow)
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    def snapshot(self, limit: int = 50) -> list[dict]:
+        """Statements ordered by cumulative time, most expensive first."""
+        with self._lock:
+            items = [(key, dict(entry)) for key, entry in self._stats.items()]
+        items.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+        return [
+            {
+                "statement": key,
+                "count": entry["count"],
+                "slow": entry["slow"],
+                "total_ms": round(entry["total_ms"], 3),
+                "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                "max_ms": round(entry["max_ms"], 3),
+            }
+            for key, entry in items[:limit]
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats(
+    slow_ms=config.DB_SLOW_QUERY_MS,
+    sample_rate=config.DB_QUERY_SAMPLE_RATE,
+)
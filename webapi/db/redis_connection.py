@@ -1,16 +1,102 @@
-from redis import Redis
+"""Process-wide Redis connection pools.
+
+One blocking ``ConnectionPool`` (caches, listeners, threadpool callers) and
+one asyncio pool (async routes) are shared by the whole process, so requests
+reuse connections instead of opening one each. Both are sized by
+``REDIS_MAX_CONNECTIONS`` and ping idle connections every
+``REDIS_HEALTH_CHECK_INTERVAL`` seconds before reuse. ``main.lifespan`` creates
+them at startup and closes them at shutdown.
+"""
+import time
+from typing import Optional
+
+from redis import ConnectionPool, Redis
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
 
 from core import config
 
+_pool: Optional[ConnectionPool] = None
+_shared_redis: Optional[Redis] = None
+_async_pool: Optional[aioredis.ConnectionPool] = None
+_async_redis: Optional[aioredis.Redis] = None
+
+
+def _pool_options() -> dict:
+    return {
+        "host": config.REDIS_HOST,
+        "port": config.REDIS_PORT,
+        "password": config.REDIS_PSW,
+        "decode_responses": config.REDIS_DECODE_RESP,
+        "max_connections": config.REDIS_MAX_CONNECTIONS,
+        "health_check_interval": config.REDIS_HEALTH_CHECK_INTERVAL,
+        "socket_connect_timeout": config.REDIS_SOCKET_TIMEOUT,
+        "socket_timeout": config.REDIS_SOCKET_TIMEOUT,
+    }
+
+
+def shared_redis() -> Redis:
+    """Blocking client on the process-wide pool."""
+    global _pool, _shared_redis
+    if _shared_redis is None:
+        _pool = ConnectionPool(**_pool_options())
+        _shared_redis = Redis(connection_pool=_pool)
+    return _shared_redis
+
+
+def async_redis() -> aioredis.Redis:
+    """asyncio client on the process-wide async pool."""
+    global _async_pool, _async_redis
+    if _async_redis is None:
+        _async_pool = aioredis.ConnectionPool(**_pool_options())
+        _async_redis = aioredis.Redis(connection_pool=_async_pool)
+    return _async_redis
+
 
 def get_redis():
-    redis = Redis(
-        host=config.REDIS_HOST,
-        port=config.REDIS_PORT,
-        password=config.REDIS_PSW,
-        decode_responses=config.REDIS_DECODE_RESP
-    )
+    yield shared_redis()
+
+
+async def get_async_redis():
+    yield async_redis()
+
+
+def init_redis() -> None:
+    shared_redis()
+    async_redis()
+
+
+async def close_redis() -> None:
+    global _pool, _shared_redis, _async_pool, _async_redis
+    if _async_pool is not None:
+        await _async_pool.disconnect()
+    if _pool is not None:
+        _pool.disconnect()
+    _pool = _shared_redis = _async_pool = _async_redis = None
+
+
+def _pool_status(pool) -> Optional[dict]:
+    if pool is None:
+        return None
+    in_use = len(pool._in_use_connections)
+    available = len(pool._available_connections)
+    return {
+        "max_connections": pool.max_connections,
+        "in_use": in_use,
+        "available": available,
+        "created": in_use + available,
+    }
+
+
+def pool_stats() -> dict:
+    return {"sync": _pool_status(_pool), "async": _pool_status(_async_pool)}
+
+
+async def ping() -> dict:
+    """Round trip on the async pool; never raises."""
+    started = time.perf_counter()
     try:
-        yield redis
-    finally:
-        redis.close()
\ No newline at end of file
+        await async_redis().ping()
+    except (RedisError, OSError) as exc:
+        return {"ok": False, "error": str(exc)}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 3)}
@@ -0,0 +1,82 @@
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import jwt
+from fastapi import Request
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Any
+    async_engine: Optional[Any] = None
+
+
+class ReplicaRouter:
+    """Round-robin replica selection with failure cooldown and write pinning.
+
+    A principal that committed a write is pinned to the primary for
+    ``pin_seconds`` so its next reads observe that write even if replicas lag.
+    Pins live in-process, which matches the single uvicorn worker the image runs.
+    """
+
+    def __init__(self, replicas: list[Replica], pin_seconds: float, retry_seconds: float):
+        self.replicas = replicas
+        self.pin_seconds = pin_seconds
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._cursor = itertools.count()
+        self._down_until: dict[str, float] = {}
+        self._pins: dict[str, float] = {}
+
+    def pin(self, principal: Optional[str]) -> None:
+        if not principal or not self.replicas or self.pin_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._pins) > 10_000:
+                self._pins = {key: until for key, until in self._pins.items() if until > now}
+            self._pins[principal] = now + self.pin_seconds
+
+    def is_pinned(self, principal: Optional[str]) -> bool:
+        if not principal:
+            return False
+        with self._lock:
+            until = self._pins.get(principal)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._pins[principal]
+                return False
+            return True
+
+    def mark_down(self, replica: Replica) -> None:
+        with self._lock:
+            self._down_until[replica.name] = time.monotonic() + self.retry_seconds
+
+    def candidates(self, principal: Optional[str] = None) -> list[Replica]:
+        """Healthy replicas in round-robin order, or none when the caller is pinned."""
+        if not self.replicas or self.is_pinned(principal):
+            return []
+        start = next(self._cursor) % len(self.replicas)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        now = time.monotonic()
+        with self._lock:
+            return [replica for replica in ordered if self._down_until.get(replica.name, 0) <= now]
+
+
+def principal_key(request: Request) -> Optional[str]:
+    """Username from the bearer token, used only to route reads (not to authorize)."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return None
+    data = payload.get("data")
+    return data.get("sub") if isinstance(data, dict) else None
@@ -0,0 +1,120 @@
+"""Concurrent read/write throughput of the SQLite profiles.
+
+Runs the same mixed workload against a fresh database file per profile:
+writer threads commit one prompt per transaction while reader threads run the
+first page of a user's prompt listing. Run from ``webapi/``::
+
+    python -m db.sqlite_bench --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+
+from core import config
+from db.db_connection import build_engine
+from db.migrations import upgrade
+from models.prompts import Prompts
+from models.user import User
+
+
+def _seed(engine, prompts: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User).values(
+                username="bench", name="bench", last_name="user", email="bench@example.com", hashed_password="x"
+            )
+        )
+        connection.execute(
+            insert(Prompts),
+            [
+                {"user_id": 1, "model_name": "gpt-5", "prompt_text": f"seed {index}", "category": "qa", "rate": 3}
+                for index in range(prompts)
+            ],
+        )
+
+
+def _worker(engine, operation, deadline: float, counts: dict, key: str, lock: threading.Lock) -> None:
+    done = errors = 0
+    while time.perf_counter() < deadline:
+        try:
+            operation(engine)
+            done += 1
+        except OperationalError:
+            errors += 1
+    with lock:
+        counts[key] += done
+        counts[f"{key}_errors"] += errors
+
+
+def _write(engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Prompts).values(user_id=1, model_name="gpt-5", prompt_text="bench", category="qa", rate=4)
+        )
+
+
+def _read(engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(
+            select(Prompts).where(Prompts.user_id == 1).order_by(Prompts.id.desc()).limit(10)
+        ).all()
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float, seed: int) -> dict:
+    original = config.SQLITE_PROFILE
+    config.SQLITE_PROFILE = profile
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{Path(directory) / 'bench.db'}"
+            writer = build_engine(url)
+            reader = build_engine(url, sqlite_reader=True) if profile == "embedded" else writer
+            upgrade(writer)
+            _seed(writer, seed)
+
+            counts = {"writes": 0, "writes_errors": 0, "reads": 0, "reads_errors": 0}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + seconds
+            threads = [
+                threading.Thread(target=_worker, args=(writer, _write, deadline, counts, "writes", lock))
+                for _ in range(writers)
+            ] + [
+                threading.Thread(target=_worker, args=(reader, _read, deadline, counts, "reads", lock))
+                for _ in range(readers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            writer.dispose()
+            reader.dispose()
+    finally:
+        config.SQLITE_PROFILE = original
+    return {key: value / seconds if not key.endswith("_errors") else value for key, value in counts.items()}
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=10_000, help="prompts inserted before the run")
+    args = parser.parse_args(argv)
+
+    print(f"{'profile':<10} {'writes/s':>10} {'reads/s':>10} {'write errors':>13} {'read errors':>12}")
+    for profile in ("default", "embedded"):
+        result = run_profile(profile, args.writers, args.readers, args.seconds, args.seed)
+        print(
+            f"{profile:<10} {result['writes']:>10.0f} {result['reads']:>10.0f} "
+            f"{result['writes_errors']:>13} {result['reads_errors']:>12}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,47 @@
+"""Embedded SQLite profile for the file-based fallback database.
+
+WAL lets readers run alongside the writer, so writes go through one pooled
+connection (no SQLITE_BUSY fights between writers) and read-only routes get a
+separate pool of ``query_only`` connections. Settings live in ``core.config``
+(``SQLITE_*``); ``python -m db.sqlite_bench`` compares it with stock SQLite.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from core import config
+
+
+def is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def embedded_profile_enabled(url: str) -> bool:
+    return config.SQLITE_PROFILE == "embedded" and is_file_sqlite(url)
+
+
+def profile_pragmas(query_only: bool = False) -> list[str]:
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}",
+        # Negative cache_size is in KiB rather than pages.
+        f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}",
+        f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+    if query_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def apply_pragmas(engine: Engine, pragmas: list[str]) -> None:
+    """Run ``pragmas`` on every new DBAPI connection of a (sync) engine."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
@@ -0,0 +1,115 @@
+from typing import Any, Callable, Optional
+
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+
+class ThreadedSession:
+    """Async facade over a synchronous SQLModel ``Session``.
+
+    Exposes the subset of ``sqlmodel.ext.asyncio.session.AsyncSession`` used by
+    the routes so handlers can be written once with ``await session...`` and run
+    against either a real ``AsyncSession`` (``DB_ASYNC=true``) or a blocking
+    driver. Every call that may touch the database runs in the threadpool, and
+    results are prebuffered like ``AsyncSession`` so iterating them never does
+    I/O on the event loop.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @staticmethod
+    def _buffered(execution_options: Optional[dict]) -> dict:
+        return {"prebuffer_rows": True, **(execution_options or {})}
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    def expunge(self, instance: Any) -> None:
+        self.sync_session.expunge(instance)
+
+    async def exec(self, statement, *, params=None, execution_options=None, bind_arguments=None):
+        return await run_in_threadpool(
+            self.sync_session.exec,
+            statement,
+            params=params,
+            execution_options=self._buffered(execution_options),
+            bind_arguments=bind_arguments,
+        )
+
+    async def execute(self, statement, params=None, *, execution_options=None, bind_arguments=None):
+        return await run_in_threadpool(
+            self.sync_session.execute,
+            statement,
+            params,
+            execution_options=self._buffered(execution_options),
+            bind_arguments=bind_arguments,
+        )
+
+    async def stream(self, statement, params=None, *, execution_options=None, bind_arguments=None):
+        """Execute on a server-side cursor; rows are fetched lazily via ``ThreadedResult``."""
+        result = await run_in_threadpool(
+            self.sync_session.execute,
+            statement,
+            params,
+            execution_options={**(execution_options or {}), "stream_results": True},
+            bind_arguments=bind_arguments,
+        )
+        return ThreadedResult(result)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None) -> None:
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance: Any, attribute_names=None) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def connection(self, **kwargs):
+        return await run_in_threadpool(self.sync_session.connection, **kwargs)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn: Callable[..., Any], *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def __aenter__(self) -> "ThreadedSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+
+class ThreadedResult:
+    """Async facade over a streaming ``Result``, like ``AsyncResult``."""
+
+    def __init__(self, result):
+        self._result = result
+
+    async def partitions(self, size: Optional[int] = None):
+        partitions = self._result.partitions(size)
+        try:
+            while True:
+                partition = await run_in_threadpool(next, partitions, None)
+                if partition is None:
+                    return
+                yield partition
+        finally:
+            await run_in_threadpool(self._result.close)
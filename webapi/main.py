@@ -1,6 +1,12 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 import uvicorn
 from api.routers import api_router
+from auth.password_hasher import password_hasher
+from auth.revocation import revocations
+from db.db_connection import ensure_primary_schema
+from db.redis_connection import close_redis, init_redis
 # from api.endpoints.v1 import auths, users, prompts
 
 tags_metadata = [
@@ -16,15 +22,33 @@ tags_metadata = [
         "name": "Prompts",
         "description": "Operations with prompts.",
     },
+    {
+        "name": "Admin",
+        "description": "Operational metrics for admins (database and Redis pools, query stats, auth caches).",
+    },
 ]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_primary_schema()
+    init_redis()
+    password_hasher.start()
+    revocations.start_listener()
+    yield
+    revocations.stop_listener()
+    password_hasher.shutdown()
+    await close_redis()
+
+
 myapp = FastAPI(
     title="Portfolio API",
     description="API for managing users, prompts, and authentication in a web environment.",
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_tags=tags_metadata
+    openapi_tags=tags_metadata,
+    lifespan=lifespan,
 )
 
 
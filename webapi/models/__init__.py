@@ -1,4 +1,5 @@
 from .user import User
 from .prompts import Prompts
+from .prompt_stats import PromptStats
 
-__all__ = ["User", "Prompts"]
+__all__ = ["User", "Prompts", "PromptStats"]
@@ -0,0 +1,17 @@
+from sqlmodel import Field, SQLModel
+
+
+class PromptStats(SQLModel, table=True):
+    """Per-user prompt count and rate total for each category/model pair.
+
+    Maintained incrementally by ``db.prompt_stats`` in the same transaction as
+    every prompt write; ``python -m db.prompt_stats rebuild`` reconciles it.
+    """
+
+    __tablename__ = "prompt_stats"
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    category: str = Field(max_length=30, primary_key=True)
+    model_name: str = Field(max_length=30, primary_key=True)
+    prompt_count: int = Field(default=0, nullable=False)
+    rate_sum: int = Field(default=0, nullable=False)
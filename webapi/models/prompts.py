@@ -1,10 +1,25 @@
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 
+# Non-admin listings always filter by user_id and use the composite index; admin
+# filters seek on one equality column. Each index ends in id so ORDER BY id and
+# keyset cursors read matches in order instead of walking the primary key.
+PROMPTS_INDEXES = {
+    "ix_prompts_user_category_model_rate": ["user_id", "category", "model_name", "rate", "id"],
+    "ix_prompts_category": ["category", "id"],
+    "ix_prompts_model_name": ["model_name", "id"],
+    "ix_prompts_rate": ["rate", "id"],
+    # Owner's prompts in id order, for chunked deletes.
+    "ix_prompts_user_id": ["user_id", "id"],
+}
+
 
 class Prompts(SQLModel, table=True):
+    __table_args__ = tuple(Index(name, *columns) for name, columns in PROMPTS_INDEXES.items())
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", nullable=False)
     model_name: str = Field(max_length=30, nullable=False)
@@ -12,7 +27,9 @@ class Prompts(SQLModel, table=True):
     category: str = Field(max_length=30, nullable=False)
     rate: int = Field(nullable=False, ge=1, le=5)
 
+    # Relationships never load implicitly; routes that need them opt in with
+    # selectinload(), so accidental N+1 access fails loudly instead.
     user: Optional["User"] = Relationship(
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise"},
         back_populates="prompts"
     )
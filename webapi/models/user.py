@@ -13,7 +13,9 @@ class User(SQLModel, table=True):
     hashed_password: str = Field(max_length=255)  # Longer for bcrypt hashes
     role: str = Field(default="user", max_length=20, nullable=False)
 
+    # Loaded only via selectinload() (see get_user_with_prompts). Deletes do not
+    # load the collection; prompts are removed by the database/route explicitly.
     prompts: List["Prompts"] = Relationship(
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise", "passive_deletes": True},
         back_populates="user"
     )
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class PromptCreate(BaseModel):
@@ -11,6 +11,77 @@ class PromptCreate(BaseModel):
     rate: int = Field(ge=1, le=5)
 
 
+class PromptFilters(BaseModel):
+    user_id: Optional[int] = None
+    category: Optional[str] = None
+    model_name: Optional[str] = None
+    rate: Optional[int] = None
+
+
+class PromptBatchValues(BaseModel):
+    model_name: Optional[str] = None
+    prompt_text: Optional[str] = Field(default=None, max_length=150)
+    category: Optional[str] = None
+    rate: Optional[int] = Field(default=None, ge=1, le=5)
+
+
+class PromptBatch(BaseModel):
+    """Set-based update or delete of the prompts selected by ``ids`` or ``filters``."""
+
+    action: Literal["update", "delete"]
+    ids: Optional[list[int]] = Field(default=None, min_length=1, max_length=10000)
+    filters: Optional[PromptFilters] = None
+    values: Optional[PromptBatchValues] = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.ids is None) == (self.filters is None):
+            raise ValueError("Provide exactly one of ids or filters")
+        # An empty filter object would select every prompt the caller can reach;
+        # empty strings are skipped by prompt_conditions, so they do not count.
+        if self.filters is not None and not any(
+            value not in (None, "") for value in self.filters.model_dump().values()
+        ):
+            raise ValueError("filters needs at least one non-empty field")
+        if self.action == "update" and not (self.values and self.values.model_dump(exclude_none=True)):
+            raise ValueError("update needs at least one value to set")
+        return self
+
+
+class PromptBatchResult(BaseModel):
+    action: str
+    affected: int
+
+
+class PromptSearchHit(BaseModel):
+    id: int
+    user_id: int
+    model_name: str
+    prompt_text: str
+    category: str
+    rate: int
+    rank: float
+
+
+class PromptStatsGroup(BaseModel):
+    category: str
+    model_name: str
+    prompt_count: int
+    avg_rate: float
+
+
+class BulkRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class BulkImportReport(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: list[BulkRowError] = []
+    errors_truncated: bool = False
+
+
 class PromptRead(BaseModel):
     id: int
     model_name: str
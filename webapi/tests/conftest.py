@@ -3,16 +3,21 @@ from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel import Session, create_engine
 from sqlalchemy.pool import StaticPool
 
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from main import myapp
-from db.db_connection import get_session
-from db.redis_connection import get_redis
-from auth.auth_service import crear_jwt
+from db.db_connection import get_read_session, get_session, get_session_factory, get_stream_session_factory
+from db.migrations import upgrade
+from db.threaded_session import ThreadedSession
+from db.redis_connection import get_async_redis, get_redis
+from auth.auth_service import crear_jwt, verified_tokens
+from auth.principal_cache import principal_cache
+from auth.rate_limit import ip_limiter, username_limiter
+from auth.revocation import revocations
 from models.user import User
 from models.prompts import Prompts
 
@@ -20,16 +25,40 @@ from models.prompts import Prompts
 class FakeRedis:
     def __init__(self):
         self.store: dict[str, str] = {}
-
-    def exists(self, key: str) -> bool:
-        return key in self.store
-
-    def setex(self, key: str, ttl: int, value: str):
-        self.store[key] = value
+        self.published: list[tuple[str, str]] = []
 
     def get(self, key: str):
         return self.store.get(key)
 
+    def set(self, key: str, value, ex: int | None = None, nx: bool = False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = str(value)
+        return True
+
+    def publish(self, channel: str, message: str) -> int:
+        self.published.append((channel, message))
+        return 0
+
+    def delete(self, *keys: str) -> int:
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+
+class AsyncFakeRedis:
+    """asyncio-client view of a FakeRedis, sharing its store."""
+
+    def __init__(self, fake: FakeRedis):
+        self.fake = fake
+
+    async def get(self, key: str):
+        return self.fake.get(key)
+
+    async def set(self, key: str, value, ex: int | None = None, nx: bool = False):
+        return self.fake.set(key, value, ex=ex, nx=nx)
+
+    async def delete(self, *keys: str) -> int:
+        return self.fake.delete(*keys)
+
 
 @pytest.fixture
 def engine():
@@ -38,7 +67,7 @@ def engine():
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
-    SQLModel.metadata.create_all(test_engine)
+    upgrade(test_engine)
     return test_engine
 
 
@@ -54,15 +83,46 @@ def fake_redis():
 
 
 @pytest.fixture
-def client(db_session, fake_redis):
+def client(db_session, fake_redis, monkeypatch):
+    # Routes use the AsyncSession API; one facade per test keeps monkeypatches visible.
+    request_session = ThreadedSession(db_session)
+    # Each test starts with empty auth caches; the principal cache's Redis tier is the fake.
+    principal_cache.clear()
+    verified_tokens.clear()
+    monkeypatch.setattr(principal_cache, "redis_factory", lambda: fake_redis)
+    # Revocations are published to the fake; no listener thread is started.
+    revocations.clear()
+    monkeypatch.setattr(revocations, "redis_factory", lambda: fake_redis)
+    monkeypatch.setattr(revocations, "start_listener", lambda: None)
+    # Login throttling counts in memory.
+    for limiter in (ip_limiter, username_limiter):
+        limiter.clear()
+        monkeypatch.setattr(limiter, "redis_factory", None)
+
     def _override_get_session():
-        yield db_session
+        yield request_session
+
+    def _override_get_stream_session_factory():
+        async def open_session():
+            return ThreadedSession(Session(db_session.bind, expire_on_commit=False))
+
+        return open_session
+
+    def _override_get_session_factory():
+        return lambda: ThreadedSession(Session(db_session.bind, expire_on_commit=False))
 
     def _override_get_redis():
         yield fake_redis
 
+    async def _override_get_async_redis():
+        yield AsyncFakeRedis(fake_redis)
+
     myapp.dependency_overrides[get_session] = _override_get_session
+    myapp.dependency_overrides[get_read_session] = _override_get_session
+    myapp.dependency_overrides[get_stream_session_factory] = _override_get_stream_session_factory
+    myapp.dependency_overrides[get_session_factory] = _override_get_session_factory
     myapp.dependency_overrides[get_redis] = _override_get_redis
+    myapp.dependency_overrides[get_async_redis] = _override_get_async_redis
 
     with TestClient(myapp, raise_server_exceptions=False) as test_client:
         yield test_client
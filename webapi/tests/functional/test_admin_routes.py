@@ -0,0 +1,181 @@
+import logging
+
+import pytest
+from sqlalchemy import exc, text
+from sqlmodel import create_engine
+
+from auth.auth_service import crear_jwt
+from db import redis_connection
+from db.pool_stats import InstrumentedQueuePool, pool_status
+from db.query_stats import QueryStats, fingerprint, query_stats, redact
+from models.user import User
+
+
+def create_user(db_session, username: str, role: str = "user") -> User:
+    user = User(
+        username=username,
+        name=username,
+        last_name="User",
+        email=f"{username}@example.com",
+        hashed_password="password",
+        role=role,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def auth_headers_for(user: User) -> dict[str, str]:
+    token = crear_jwt({"sub": user.username, "role": user.role, "user_id": user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_admin_reads_pool_stats(client, db_session):
+    admin = create_user(db_session, "pool_admin", role="admin")
+
+    response = client.get("/api/v1/admin/db/pool", headers=auth_headers_for(admin))
+
+    assert response.status_code == 200
+    primary = response.json()["pools"]["primary"]
+    assert primary["pool_class"] == "InstrumentedQueuePool"
+    for key in ("size", "checked_out", "overflow", "checkouts", "timeouts", "wait_ms_avg"):
+        assert key in primary
+
+
+def test_regular_user_cannot_read_pool_stats(client, auth_header):
+    response = client.get("/api/v1/admin/db/pool", headers=auth_header)
+
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Admin access required"
+
+
+def test_instrumented_pool_counts_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+    with engine.connect():
+        status = pool_status(engine)
+        assert status["checked_out"] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    status = pool_status(engine)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["timeouts"] == 1
+    assert status["connects"] == 1
+    assert status["wait_ms_max"] >= 50
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    assert fingerprint("SELECT * FROM prompts WHERE id IN (?, ?, ?) AND rate = 5") == (
+        "SELECT * FROM prompts WHERE id IN (?+) AND rate = ?"
+    )
+    assert fingerprint("SELECT  *\nFROM user WHERE username = 'bob'") == "SELECT * FROM user WHERE username = ?"
+
+
+def test_redact_never_exposes_values():
+    assert redact(("secret", 3)) == ["<str>", "<int>"]
+    assert redact({"password": "secret"}) == {"password": "<str>"}
+    assert redact([("a",), ("b",)], executemany=True) == "<2 parameter sets>"
+
+
+def test_slow_queries_are_logged_and_aggregated(caplog):
+    engine = create_engine("sqlite://")
+    stats = QueryStats(slow_ms=0, sample_rate=0)
+    stats.attach(engine)
+
+    with caplog.at_level(logging.WARNING, logger="webapi.sql"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT :value"), {"value": "secret"})
+            connection.execute(text("SELECT :value"), {"value": "other"})
+
+    assert "slow query" in caplog.text
+    assert "secret" not in caplog.text
+    entry = next(item for item in stats.snapshot() if item["statement"] == "SELECT ?")
+    assert entry["count"] == 2
+    assert entry["slow"] == 2
+
+
+def test_fast_queries_are_not_logged(caplog):
+    engine = create_engine("sqlite://")
+    stats = QueryStats(slow_ms=10_000, sample_rate=0)
+    stats.attach(engine)
+
+    with caplog.at_level(logging.INFO, logger="webapi.sql"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    assert caplog.text == ""
+    assert stats.snapshot()[0]["count"] == 1
+
+
+def test_failed_queries_do_not_leak_timing_entries():
+    engine = create_engine("sqlite://")
+    stats = QueryStats(slow_ms=10_000, sample_rate=0)
+    stats.attach(engine)
+
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(exc.OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+        assert connection.info["query_started"] == []
+        connection.execute(text("SELECT 1"))
+        assert connection.info["query_started"] == []
+
+    assert [item["statement"] for item in stats.snapshot()] == ["SELECT ?"]
+
+
+def test_admin_reads_and_resets_query_stats(client, db_session):
+    admin = create_user(db_session, "query_admin", role="admin")
+    headers = auth_headers_for(admin)
+    query_stats.record("SELECT ? FROM admin_test", 12.5, is_slow=True)
+
+    response = client.get("/api/v1/admin/db/queries", headers=headers)
+
+    assert response.status_code == 200
+    statements = {item["statement"]: item for item in response.json()["statements"]}
+    assert statements["SELECT ? FROM admin_test"]["slow"] == 1
+
+    assert client.delete("/api/v1/admin/db/queries", headers=headers).status_code == 200
+    assert client.get("/api/v1/admin/db/queries", headers=headers).json()["statements"] == []
+
+
+def test_admin_reads_hashing_stats(client, db_session):
+    admin = create_user(db_session, "hashing_admin", role="admin")
+
+    response = client.get("/api/v1/admin/auth/hashing", headers=auth_headers_for(admin))
+
+    assert response.status_code == 200
+    assert {"workers", "max_pending", "in_flight", "submitted", "rejected", "avg_ms"} <= set(response.json())
+
+
+def test_redis_clients_share_process_wide_pools():
+    sync_client = redis_connection.shared_redis()
+
+    assert next(redis_connection.get_redis()) is sync_client
+    assert redis_connection.async_redis() is redis_connection.async_redis()
+    stats = redis_connection.pool_stats()
+    assert stats["sync"]["max_connections"] == stats["async"]["max_connections"]
+    assert stats["sync"]["in_use"] == 0
+
+
+def test_admin_reads_redis_health_and_pool_stats(client, db_session, monkeypatch):
+    admin = create_user(db_session, "redis_admin", role="admin")
+
+    class DownRedis:
+        async def ping(self):
+            raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(redis_connection, "async_redis", DownRedis)
+    response = client.get("/api/v1/admin/redis", headers=auth_headers_for(admin))
+
+    assert response.status_code == 200
+    assert response.json()["health"] == {"ok": False, "error": "connection refused"}
+    assert set(response.json()["pools"]) == {"sync", "async"}
@@ -0,0 +1,87 @@
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import to_async_url
+from db.db_connection import build_async_engine, get_read_session, get_session, get_stream_session_factory
+from db.migrations import upgrade
+from main import myapp
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'async.db'}"
+    upgrade(create_engine(db_url))
+    async_engine = create_async_engine(to_async_url(db_url), poolclass=NullPool)
+
+    async def _override_get_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    def _override_get_stream_session_factory():
+        async def open_session():
+            return AsyncSession(async_engine, expire_on_commit=False)
+
+        return open_session
+
+    myapp.dependency_overrides[get_session] = _override_get_session
+    myapp.dependency_overrides[get_read_session] = _override_get_session
+    myapp.dependency_overrides[get_stream_session_factory] = _override_get_stream_session_factory
+    with TestClient(myapp, raise_server_exceptions=False) as test_client:
+        yield test_client
+    myapp.dependency_overrides.clear()
+
+
+def test_to_async_url_maps_known_drivers():
+    assert to_async_url("sqlite:///./crud_data.db") == "sqlite+aiosqlite:///./crud_data.db"
+    assert to_async_url("mariadb+mariadbconnector://u:p@db:3306/crud_data") == "mariadb+asyncmy://u:p@db:3306/crud_data"
+    assert to_async_url("mysql://u:p@db/crud_data") == "mysql+asyncmy://u:p@db/crud_data"
+
+
+def test_missing_async_driver_fails_with_a_clear_error(monkeypatch):
+    monkeypatch.setitem(sys.modules, "asyncmy", None)
+
+    with pytest.raises(RuntimeError, match="needs the mariadb\\+asyncmy driver"):
+        build_async_engine("mariadb+asyncmy://u:p@db:3306/crud_data")
+
+
+def test_routes_run_on_async_session(async_client, user_payload):
+    assert async_client.post("/api/v1/auth/signup", json=user_payload).status_code == 200
+    login = async_client.post(
+        "/api/v1/auth/login",
+        json={"username": user_payload["username"], "password": user_payload["hashed_password"]},
+    )
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    created = async_client.post(
+        "/api/v1/prompts",
+        json={"model_name": "gpt-4.1", "prompt_text": "async prompt", "category": "qa", "rate": 4},
+        headers=headers,
+    )
+    assert created.status_code == 200
+    prompt_id = created.json()["id"]
+
+    listed = async_client.get("/api/v1/prompts", headers=headers)
+    assert listed.status_code == 200
+    assert [item["id"] for item in listed.json()] == [prompt_id]
+
+    exported = async_client.get("/api/v1/prompts/export", headers=headers)
+    assert exported.status_code == 200
+    assert f'"id": {prompt_id}' in exported.text
+
+    user_id = created.json()["user_id"]
+    with_prompts = async_client.get(f"/api/v1/users/prompts/{user_id}", headers=headers)
+    assert with_prompts.status_code == 200
+    assert with_prompts.json()["prompts"][0]["id"] == prompt_id
+
+    deleted = async_client.delete(f"/api/v1/prompts/{prompt_id}", headers=headers)
+    assert deleted.status_code == 200
+    assert async_client.get(f"/api/v1/prompts/{prompt_id}", headers=headers).status_code == 404
@@ -1,11 +1,19 @@
+import asyncio
 import base64
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
 
+import jwt
+import pytest
 from passlib.hash import sha256_crypt
 from sqlmodel import select
 
 from models.user import User
 import api.endpoints.v1.auths as auths_module
-from auth.auth_service import validar_jwt_raw
+import auth.auth_service as auth_service_module
+from auth.auth_service import VerifiedTokenCache, crear_jwt, validar_jwt_raw, verified_tokens
+from auth.password_hasher import PasswordHasher, build_context, calibrate, password_hasher
 
 
 def test_signup_success(client, user_payload, db_session):
@@ -223,7 +231,7 @@ def test_generate_password_success_saves_password_and_calls_email(client, db_ses
     assert sha256_crypt.verify("temporary_pwd", updated.hashed_password)
 
 
-def test_generate_password_email_failure_returns_500(client, db_session, monkeypatch):
+def test_generate_password_email_failure_returns_500(client, db_session, fake_redis, monkeypatch):
     user = User(
         username="mail_fail_user",
         name="mail",
@@ -242,6 +250,8 @@ def test_generate_password_email_failure_returns_500(client, db_session, monkeyp
     response = client.post("/api/v1/auth/generate", params={"username": user.username})
 
     assert response.status_code == 500
+    # The reserved recovery key is released again.
+    assert not [key for key in fake_redis.store if not key.startswith("revoked:")]
 
 
 def test_recover_invalid_key_format_returns_401(client):
@@ -314,3 +324,116 @@ def test_recover_success_returns_key_and_password(client, db_session, fake_redis
 
     assert response.status_code == 200
     assert response.json() == {"key": key, "password": "temporary_pwd"}
+
+
+def test_signup_returns_503_when_hashing_is_saturated(client, user_payload, monkeypatch):
+    monkeypatch.setattr(password_hasher, "in_flight", password_hasher.max_pending)
+    rejected = password_hasher.rejected
+
+    response = client.post("/api/v1/auth/signup", json=user_payload)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(password_hasher.retry_after)
+    assert password_hasher.rejected == rejected + 1
+
+
+def test_password_hasher_roundtrip_in_worker_process():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    try:
+        hashed = asyncio.run(hasher.hash("secret"))
+        assert asyncio.run(hasher.verify("secret", hashed))
+        assert not asyncio.run(hasher.verify("wrong", hashed))
+    finally:
+        hasher.shutdown()
+
+    metrics = hasher.metrics()
+    assert metrics["completed"] == 3
+    assert metrics["in_flight"] == 0
+    assert metrics["max_ms"] >= metrics["avg_ms"] > 0
+
+
+def test_password_hasher_replaces_a_broken_pool_and_retries():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    hasher.start()
+    try:
+        broken = hasher._executor
+        with pytest.raises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+
+        hashed = asyncio.run(hasher.hash("secret"))
+
+        assert build_context(hasher.scheme).verify("secret", hashed)
+        assert hasher._executor is not broken
+    finally:
+        hasher.shutdown()
+    assert hasher.metrics()["restarts"] == 1
+    assert hasher.metrics()["failed"] == 0
+
+
+def test_login_rehashes_password_with_outdated_scheme(client, db_session, monkeypatch):
+    user = User(
+        username="legacy_hash",
+        name="legacy",
+        last_name="hash",
+        email="legacy_hash@example.com",
+        hashed_password=sha256_crypt.using(rounds=1000).hash("password"),
+    )
+    db_session.add(user)
+    db_session.commit()
+    user_id = user.id
+    monkeypatch.setattr(password_hasher, "scheme", "bcrypt")
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+
+    response = client.post("/api/v1/auth/login", json={"username": "legacy_hash", "password": "password"})
+
+    assert response.status_code == 200
+    # The route shares this session and detaches the user while verifying.
+    user = db_session.get(User, user_id, populate_existing=True)
+    assert user.hashed_password.startswith("$2b$04$")
+    assert build_context("bcrypt", 4).verify("password", user.hashed_password)
+
+    # Up-to-date hashes are left alone.
+    stored = user.hashed_password
+    assert client.post("/api/v1/auth/login", json={"username": "legacy_hash", "password": "password"}).status_code == 200
+    user = db_session.get(User, user_id, populate_existing=True)
+    assert user.hashed_password == stored
+
+
+def test_calibrate_picks_rounds_near_target():
+    rounds, elapsed = calibrate("bcrypt", target_ms=20, samples=1)
+
+    assert 4 <= rounds < 12
+    assert elapsed < 80
+
+
+def test_verified_token_cache_hits_repeat_tokens_until_exp(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=2)
+    monkeypatch.setattr(auth_service_module, "verified_tokens", cache)
+    token = crear_jwt({"sub": "cached", "role": "user", "user_id": 1})
+
+    assert validar_jwt_raw(token)["sub"] == "cached"
+    assert validar_jwt_raw(token)["sub"] == "cached"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Past exp the cached entry is dropped and the token fails verification.
+    expires_at = jwt.decode(token, options={"verify_signature": False})["exp"]
+    monkeypatch.setattr(auth_service_module.time, "time", lambda: expires_at + 1)
+    assert cache.get(token) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_verified_token_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(max_entries=2)
+    expires_at = time.time() + 60
+    for token in ("a", "b", "c"):
+        cache.put(token, {"exp": expires_at, "data": {"sub": token}})
+
+    assert cache.get("a") is None
+    assert cache.get("c")["data"] == {"sub": "c"}
+
+
+def test_invalid_token_is_not_cached():
+    token = crear_jwt({"sub": "forged"})[:-2] + "xx"
+
+    assert validar_jwt_raw(token) is None
+    assert verified_tokens.get(token) is None
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from sqlalchemy import exc, text
+from sqlmodel import Session, create_engine, select
+
+from db.db_connection import get_prompt_committer
+from db.group_commit import PromptGroupCommitter
+from db.migrations import upgrade
+from main import myapp
+from models.prompts import Prompts
+from models.user import User
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'group.db'}", connect_args={"check_same_thread": False})
+    upgrade(engine)
+    with Session(engine) as session:
+        session.add(User(username="group", name="g", last_name="c", email="group@example.com", hashed_password="x"))
+        session.commit()
+    return engine
+
+
+def prompt_row(index: int, rate: int = 3) -> dict:
+    return {"user_id": 1, "model_name": "gpt-5", "prompt_text": f"grouped {index}", "category": "qa", "rate": rate}
+
+
+async def submit_all(committer, rows):
+    return await asyncio.gather(*(committer.submit(row) for row in rows))
+
+
+def test_concurrent_submits_share_one_commit(file_engine):
+    committer = PromptGroupCommitter(file_engine, delay_ms=50)
+
+    ids = asyncio.run(submit_all(committer, [prompt_row(index) for index in range(20)]))
+
+    assert committer.batches == 1
+    assert len(set(ids)) == 20
+    with Session(file_engine) as session:
+        stored = dict(session.exec(select(Prompts.id, Prompts.prompt_text)).all())
+        assert [stored[prompt_id] for prompt_id in ids] == [f"grouped {index}" for index in range(20)]
+        assert session.exec(text("SELECT prompt_count, rate_sum FROM prompt_stats")).one() == (20, 60)
+
+
+def test_full_batches_commit_without_waiting(file_engine):
+    committer = PromptGroupCommitter(file_engine, delay_ms=60_000, max_batch=5)
+
+    ids = asyncio.run(asyncio.wait_for(submit_all(committer, [prompt_row(index) for index in range(10)]), 5))
+
+    assert committer.batches == 2
+    assert len(set(ids)) == 10
+
+
+def test_failed_batch_raises_for_every_caller(file_engine):
+    committer = PromptGroupCommitter(file_engine, delay_ms=10)
+    rows = [prompt_row(0), {**prompt_row(1), "prompt_text": None}]
+
+    async def submit_and_collect():
+        return await asyncio.gather(*(committer.submit(row) for row in rows), return_exceptions=True)
+
+    results = asyncio.run(submit_and_collect())
+
+    assert all(isinstance(result, exc.IntegrityError) for result in results)
+    with Session(file_engine) as session:
+        assert session.exec(select(Prompts.id)).all() == []
+
+
+def test_create_prompt_uses_group_committer_when_enabled(client, engine, auth_header, created_user):
+    committer = PromptGroupCommitter(engine, delay_ms=1)
+    myapp.dependency_overrides[get_prompt_committer] = lambda: committer
+    payload = {"model_name": "gpt-5", "prompt_text": "via group commit", "category": "qa", "rate": 4}
+
+    response = client.post("/api/v1/prompts", json=payload, headers=auth_header)
+
+    assert response.status_code == 200
+    assert response.json()["prompt_text"] == "via group commit"
+    assert committer.rows == 1
+    fetched = client.get(f"/api/v1/prompts/{response.json()['id']}", headers=auth_header)
+    assert fetched.json()["user_id"] == created_user.id
@@ -0,0 +1,122 @@
+import pytest
+from sqlalchemy import insert, inspect, text
+from sqlmodel import SQLModel, create_engine
+
+from db import migrations
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+
+
+def test_upgrade_creates_tables_and_records_version(file_engine):
+    assert migrations.current_version(file_engine) == 0
+
+    assert migrations.upgrade(file_engine) == migrations.LATEST_VERSION
+
+    tables = set(inspect(file_engine).get_table_names())
+    assert {"user", "prompts", "schema_version"} <= tables
+    assert migrations.current_version(file_engine) == migrations.LATEST_VERSION
+
+
+def test_upgrade_adopts_legacy_create_all_database(file_engine):
+    SQLModel.metadata.create_all(file_engine)
+    with file_engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO user (username, name, last_name, email, hashed_password, role) "
+                "VALUES ('legacy', 'l', 'u', 'legacy@example.com', 'x', 'user')"
+            )
+        )
+
+    migrations.upgrade(file_engine)
+
+    with file_engine.connect() as connection:
+        assert connection.execute(text("SELECT username FROM user")).scalar() == "legacy"
+    assert migrations.current_version(file_engine) == migrations.LATEST_VERSION
+
+
+def test_ensure_schema_is_a_version_check_when_current(file_engine, monkeypatch):
+    migrations.upgrade(file_engine)
+    monkeypatch.setattr(migrations, "upgrade", lambda *args, **kwargs: pytest.fail("should not migrate"))
+
+    assert migrations.ensure_schema(file_engine) == migrations.LATEST_VERSION
+
+
+def test_ensure_schema_without_auto_migrate_fails_fast(file_engine):
+    with pytest.raises(RuntimeError, match="python -m db.migrations upgrade"):
+        migrations.ensure_schema(file_engine, auto_migrate=False)
+
+
+def test_index_ddl_is_online_on_mariadb():
+    ddl = migrations.index_ddl("mariadb", "ix_demo", "prompts", ["user_id", "id"])
+
+    assert ddl == "CREATE INDEX IF NOT EXISTS ix_demo ON prompts (user_id, id) ALGORITHM=INPLACE LOCK=NONE"
+    assert "ALGORITHM" not in migrations.index_ddl("sqlite", "ix_demo", "prompts", ["user_id"])
+
+
+def test_create_index_online_is_idempotent(file_engine):
+    migrations.upgrade(file_engine)
+
+    with file_engine.begin() as connection:
+        migrations.create_index_online(connection, "ix_demo_user", "prompts", ["user_id"])
+        migrations.create_index_online(connection, "ix_demo_user", "prompts", ["user_id"])
+
+    assert "ix_demo_user" in {index["name"] for index in inspect(file_engine).get_indexes("prompts")}
+
+
+def test_prompt_stats_migration_backfills_and_rebuild_reconciles(file_engine):
+    from db.prompt_stats import rebuild
+
+    migrations.upgrade(file_engine, target=3)
+    with file_engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO user (username, name, last_name, email, hashed_password, role) "
+                "VALUES ('stats', 's', 'u', 'stats@example.com', 'x', 'user')"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO prompts (user_id, model_name, prompt_text, category, rate) VALUES "
+                "(1, 'gpt-5', 'a', 'qa', 4), (1, 'gpt-5', 'b', 'qa', 2), (1, 'gpt-4.1', 'c', 'dev', 5)"
+            )
+        )
+
+    migrations.upgrade(file_engine)
+
+    stats_query = text("SELECT category, model_name, prompt_count, rate_sum FROM prompt_stats ORDER BY category")
+    with file_engine.begin() as connection:
+        expected = [("dev", "gpt-4.1", 1, 5), ("qa", "gpt-5", 2, 6)]
+        assert connection.execute(stats_query).all() == expected
+        connection.execute(text("UPDATE prompt_stats SET prompt_count = 99"))
+        assert rebuild(connection) == 2
+        assert connection.execute(stats_query).all() == expected
+
+
+def test_portable_stats_path_merges_a_group_created_concurrently(file_engine, monkeypatch):
+    import db.prompt_stats as prompt_stats
+
+    migrations.upgrade(file_engine)
+    monkeypatch.setattr(prompt_stats, "NATIVE_UPSERT_DIALECTS", set())
+    row = {"user_id": 1, "category": "qa", "model_name": "gpt-5", "prompt_count": 1, "rate_sum": 4}
+    real_add_to_group = prompt_stats._add_to_group
+    calls = []
+
+    def add_after_race(connection, group_row):
+        calls.append(group_row)
+        if len(calls) == 1:
+            # Another writer inserts the group between our UPDATE and INSERT.
+            connection.execute(insert(prompt_stats.stats_table).values({**group_row, "rate_sum": 2}))
+            return 0
+        return real_add_to_group(connection, group_row)
+
+    monkeypatch.setattr(prompt_stats, "_add_to_group", add_after_race)
+
+    with file_engine.begin() as connection:
+        prompt_stats.apply_rows(connection, [row])
+        stats = connection.execute(text("SELECT prompt_count, rate_sum FROM prompt_stats")).all()
+
+    assert len(calls) == 2
+    assert stats == [(2, 6)]
@@ -1,4 +1,7 @@
 from api.endpoints.v1.options import CATEGORY_OPTIONS, MODEL_OPTIONS
+from auth.auth_service import crear_jwt
+from db.db_connection import get_session, get_session_factory
+from main import myapp
 
 
 def test_read_category_options(client, auth_header):
@@ -53,3 +56,16 @@ def test_prompt_options_align_with_known_backend_values(client, auth_header):
     assert {item["value"] for item in model_response.json()["items"]} == {
         item["value"] for item in MODEL_OPTIONS
     }
+
+
+def test_options_authorize_from_token_claims_alone(client):
+    # No such user row exists: the claims-only tier never looks it up.
+    token = crear_jwt({"sub": "ghost", "user_id": 999, "role": "user"})
+    opened = []
+    myapp.dependency_overrides[get_session] = lambda: opened.append("session")
+    myapp.dependency_overrides[get_session_factory] = lambda: lambda: opened.append("factory session")
+
+    response = client.get("/api/v1/options/models", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert opened == []
@@ -0,0 +1,87 @@
+import asyncio
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from auth.auth_service import crear_jwt
+from auth.principal_cache import PrincipalCache, principal_cache
+from models.user import User
+
+
+def create_user(db_session, username: str, role: str = "user") -> User:
+    user = User(
+        username=username,
+        name=username,
+        last_name="User",
+        email=f"{username}@example.com",
+        hashed_password="password",
+        role=role,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def auth_headers_for(user: User) -> dict[str, str]:
+    token = crear_jwt({"sub": user.username, "role": user.role, "user_id": user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_principal_is_cached_locally_and_in_redis(client, db_session, fake_redis):
+    user = create_user(db_session, "cached_user")
+
+    assert client.get("/api/v1/auth/me", headers=auth_headers_for(user)).status_code == 200
+
+    assert "principal:cached_user" in fake_redis.store
+    assert "hashed_password" not in fake_redis.store["principal:cached_user"]
+    principal_cache.clear()
+    redis_hits = principal_cache.redis_hits
+    response = client.get("/api/v1/auth/me", headers=auth_headers_for(user))
+    assert response.status_code == 200
+    assert response.json()["username"] == "cached_user"
+    assert principal_cache.redis_hits == redis_hits + 1
+
+
+def test_delete_user_invalidates_cached_principal(client, db_session, fake_redis):
+    admin = create_user(db_session, "cache_admin", role="admin")
+    victim = create_user(db_session, "cache_victim")
+    victim_headers = auth_headers_for(victim)
+    assert client.get("/api/v1/auth/me", headers=victim_headers).status_code == 200
+
+    assert client.delete(f"/api/v1/users/{victim.id}", headers=auth_headers_for(admin)).status_code == 200
+
+    assert "principal:cache_victim" not in fake_redis.store
+    assert asyncio.run(principal_cache.get("cache_victim")) is None
+
+
+def test_update_user_invalidates_cached_principal(client, db_session, fake_redis):
+    user = create_user(db_session, "cache_update")
+    headers = auth_headers_for(user)
+    client.get("/api/v1/auth/me", headers=headers)
+
+    response = client.put(
+        f"/api/v1/users/{user.id}",
+        headers=headers,
+        json={"username": "cache_update", "name": "renamed", "last_name": "user",
+              "email": "renamed@example.com", "hashed_password": "new_password"},
+    )
+
+    assert response.status_code == 200
+    assert client.get("/api/v1/auth/me", headers=headers).json()["email"] == "renamed@example.com"
+
+
+def test_redis_errors_fall_back_to_local_tier():
+    class BrokenRedis:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise RedisConnectionError("redis is down")
+            return fail
+
+    cache = PrincipalCache(redis_factory=BrokenRedis, redis_retry_seconds=60)
+    user = User(id=7, username="offline", name="off", last_name="line", email="off@example.com", role="user")
+
+    asyncio.run(cache.set(user))
+    cached = asyncio.run(cache.get("offline"))
+
+    assert cached.id == 7 and cached.role == "user"
+    assert cache.stats()["redis_available"] is False
@@ -1,3 +1,9 @@
+import json
+
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+from sqlmodel import select
+
 import api.endpoints.v1.prompts as prompts_module
 from auth.auth_service import crear_jwt
 from models.prompts import Prompts
@@ -205,6 +211,56 @@ def test_read_prompts_pagination(client, db_session, created_user, auth_header):
     assert returned_id != min(first_prompt.id, second_prompt.id)
 
 
+def test_read_prompts_cursor_pagination_walks_all_pages(client, db_session, created_user, auth_header):
+    created_ids = [create_prompt(db_session, created_user.id, rate=rate).id for rate in (1, 2, 3, 4, 5)]
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/api/v1/prompts", params=params, headers=auth_header)
+        if response.status_code == 404:
+            break
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        params = {"limit": 2, "cursor": next_cursor}
+
+    assert seen == sorted(created_ids)
+
+
+def test_read_prompts_cursor_is_stable_under_inserts(client, db_session, created_user, auth_header):
+    first_page_ids = [create_prompt(db_session, created_user.id, rate=rate).id for rate in (1, 2)]
+    later_id = create_prompt(db_session, created_user.id, rate=3).id
+
+    first = client.get("/api/v1/prompts", params={"limit": 2}, headers=auth_header)
+    assert [item["id"] for item in first.json()] == first_page_ids
+    create_prompt(db_session, created_user.id, rate=4)
+
+    second = client.get(
+        "/api/v1/prompts",
+        params={"limit": 1, "cursor": first.headers["X-Next-Cursor"]},
+        headers=auth_header,
+    )
+
+    assert [item["id"] for item in second.json()] == [later_id]
+
+
+def test_read_prompts_partial_page_has_no_next_cursor(client, auth_header, created_prompt):
+    response = client.get("/api/v1/prompts", params={"limit": 5}, headers=auth_header)
+
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_read_prompts_invalid_cursor_returns_400(client, auth_header):
+    response = client.get("/api/v1/prompts", params={"cursor": "not-a-cursor"}, headers=auth_header)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
 def test_get_prompt_success(client, auth_header, created_prompt):
     response = client.get(f"/api/v1/prompts/{created_prompt.id}", headers=auth_header)
 
@@ -428,3 +484,375 @@ def test_god_can_delete_another_users_prompt(client, db_session, created_prompt)
 
     assert response.status_code == 200
     assert response.json()["id"] == created_prompt.id
+
+
+def test_bulk_import_ndjson_inserts_in_batches_and_reports_bad_rows(client, db_session, auth_header, created_user, monkeypatch):
+    monkeypatch.setattr(prompts_module.config, "PROMPTS_BULK_BATCH_SIZE", 2)
+    lines = [
+        json.dumps({"model_name": "gpt-4.1", "prompt_text": f"bulk {index}", "category": "qa", "rate": 4})
+        for index in range(5)
+    ]
+    lines.insert(2, "{not json")
+    lines.insert(4, json.dumps({"model_name": "gpt-4.1", "prompt_text": "bad rate", "category": "qa", "rate": 9}))
+    lines.append("")
+
+    def body():
+        for line in lines:
+            yield (line + "\n").encode()
+
+    response = client.post(
+        "/api/v1/prompts/bulk",
+        content=body(),
+        headers={**auth_header, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 5
+    assert report["failed"] == 2
+    assert [error["line"] for error in report["errors"]] == [3, 5]
+    assert report["errors"][0]["detail"] == "Invalid JSON"
+    assert report["errors"][1]["detail"].startswith("rate:")
+    stored = db_session.exec(select(Prompts).where(Prompts.user_id == created_user.id)).all()
+    assert sorted(prompt.prompt_text for prompt in stored) == [f"bulk {index}" for index in range(5)]
+
+
+def test_bulk_import_csv_rejects_other_users_rows_for_non_god(client, db_session, auth_header, created_user):
+    other = create_user(db_session, "bulk_other")
+    body = (
+        "user_id,model_name,prompt_text,category,rate\r\n"
+        ",gpt-4.1,\"own, quoted\",qa,5\r\n"
+        f"{other.id},gpt-4.1,not mine,qa,5\r\n"
+        "1,2\r\n"
+    )
+
+    response = client.post(
+        "/api/v1/prompts/bulk",
+        content=body,
+        headers={**auth_header, "Content-Type": "text/csv"},
+    )
+
+    report = response.json()
+    assert report["inserted"] == 1
+    assert report["errors"] == [
+        {"line": 3, "detail": "Cannot create prompts for another user"},
+        {"line": 4, "detail": "Expected 5 columns, got 2"},
+    ]
+    created = db_session.exec(select(Prompts).where(Prompts.user_id == created_user.id)).one()
+    assert created.prompt_text == "own, quoted"
+
+
+def test_bulk_import_csv_keeps_multi_line_quoted_fields(client, db_session, auth_header, created_user):
+    body = (
+        "model_name,prompt_text,category,rate\r\n"
+        'gpt-4.1,"first line\r\n\r\nsecond, with ""quotes""",qa,5\r\n'
+        "\r\n"
+        "gpt-4.1,single,qa\r\n"
+        'gpt-4.1,"spans\nlines",dev,4\r\n'
+    )
+
+    response = client.post(
+        "/api/v1/prompts/bulk",
+        content=body,
+        headers={**auth_header, "Content-Type": "text/csv"},
+    )
+
+    report = response.json()
+    assert report["inserted"] == 2
+    assert report["errors"] == [{"line": 6, "detail": "Expected 4 columns, got 3"}]
+    stored = db_session.exec(select(Prompts).where(Prompts.user_id == created_user.id).order_by(Prompts.id)).all()
+    assert [prompt.prompt_text for prompt in stored] == ['first line\n\nsecond, with "quotes"', "spans\nlines"]
+
+
+def test_bulk_import_god_can_target_users_and_missing_users_are_reported(client, db_session):
+    god = create_user(db_session, "bulk_god", role="god")
+    owner = create_user(db_session, "bulk_owner")
+    body = "\n".join(
+        json.dumps({"user_id": user_id, "model_name": "gpt-5", "prompt_text": "owned", "category": "dev", "rate": 3})
+        for user_id in (owner.id, 9999, owner.id)
+    )
+
+    response = client.post(
+        "/api/v1/prompts/bulk",
+        content=body,
+        headers={**auth_headers_for(god), "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.json() == {
+        "inserted": 2,
+        "failed": 1,
+        "errors": [{"line": 2, "detail": "User not found"}],
+        "errors_truncated": False,
+    }
+
+
+def test_bulk_import_rejects_unsupported_media_type(client, auth_header):
+    response = client.post("/api/v1/prompts/bulk", json=[], headers=auth_header)
+
+    assert response.status_code == 415
+
+
+def test_export_prompts_streams_only_own_prompts_as_ndjson(client, db_session, auth_header, created_user, monkeypatch):
+    monkeypatch.setattr(prompts_module.config, "EXPORT_BATCH_SIZE", 2)
+    other = create_user(db_session, "export_other")
+    own = [create_prompt(db_session, created_user.id, rate=rate) for rate in (1, 2, 3, 4, 5)]
+    create_prompt(db_session, other.id)
+
+    response = client.get("/api/v1/prompts/export", headers=auth_header)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [prompt.id for prompt in own]
+    assert set(rows[0]) == {"id", "user_id", "model_name", "prompt_text", "category", "rate"}
+
+
+def test_admin_exports_filtered_prompts_as_csv(client, db_session, created_user):
+    admin = create_user(db_session, "export_admin", role="admin")
+    create_prompt(db_session, created_user.id, category="dev", rate=4)
+    create_prompt(db_session, admin.id, category="dev", rate=4)
+    create_prompt(db_session, admin.id, category="qa", rate=4)
+
+    response = client.get(
+        "/api/v1/prompts/export?format=csv&category=dev",
+        headers=auth_headers_for(admin),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="prompts.csv"'
+    lines = response.text.splitlines()
+    assert lines[0] == "id,user_id,model_name,prompt_text,category,rate"
+    assert len(lines) == 3
+    assert all(",dev," in line for line in lines[1:])
+
+
+def test_export_prompts_rejects_unknown_format(client, auth_header):
+    response = client.get("/api/v1/prompts/export?format=xml", headers=auth_header)
+
+    assert response.status_code == 422
+
+
+def create_text_prompt(db_session, user_id: int, prompt_text: str) -> Prompts:
+    prompt = Prompts(user_id=user_id, model_name="gpt-4.1", prompt_text=prompt_text, category="qa", rate=3)
+    db_session.add(prompt)
+    db_session.commit()
+    db_session.refresh(prompt)
+    return prompt
+
+
+def test_search_prompts_ranks_matches_and_scopes_to_owner(client, db_session, auth_header, created_user):
+    other = create_user(db_session, "search_other")
+    strong = create_text_prompt(db_session, created_user.id, "refactor the parser, refactor tests")
+    weak = create_text_prompt(db_session, created_user.id, "refactor the ingestion pipeline for the nightly batch jobs")
+    create_text_prompt(db_session, created_user.id, "write release notes")
+    create_text_prompt(db_session, other.id, "refactor someone else's parser")
+
+    response = client.get("/api/v1/prompts/search?q=refactor", headers=auth_header)
+
+    assert response.status_code == 200
+    hits = response.json()
+    assert [hit["id"] for hit in hits] == [strong.id, weak.id]
+    assert hits[0]["rank"] <= hits[1]["rank"]
+
+
+def test_search_prompts_follows_update_and_delete(client, db_session, auth_header, created_user):
+    prompt = create_text_prompt(db_session, created_user.id, "summarize the meeting")
+
+    client.put(
+        f"/api/v1/prompts/{prompt.id}",
+        json={"model_name": "gpt-4.1", "prompt_text": "translate the meeting", "category": "qa", "rate": 3},
+        headers=auth_header,
+    )
+    assert client.get("/api/v1/prompts/search?q=summarize", headers=auth_header).json() == []
+    assert [hit["id"] for hit in client.get("/api/v1/prompts/search?q=translate", headers=auth_header).json()] == [prompt.id]
+
+    client.delete(f"/api/v1/prompts/{prompt.id}", headers=auth_header)
+    assert client.get("/api/v1/prompts/search?q=translate", headers=auth_header).json() == []
+
+
+def test_search_prompts_cursor_pagination_walks_all_hits(client, db_session, created_user):
+    admin = create_user(db_session, "search_admin", role="admin")
+    expected = {
+        create_text_prompt(db_session, created_user.id, "deploy " * count + "service").id
+        for count in (1, 1, 2, 3, 4)
+    }
+    headers = auth_headers_for(admin)
+
+    seen = []
+    response = client.get("/api/v1/prompts/search?q=deploy&limit=2", headers=headers)
+    while True:
+        seen.extend(hit["id"] for hit in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"/api/v1/prompts/search?q=deploy&limit=2&cursor={cursor}", headers=headers)
+
+    assert len(seen) == len(set(seen)) == 5
+    assert set(seen) == expected
+
+
+def test_search_prompts_treats_operators_as_plain_words(client, auth_header, created_user, db_session):
+    prompt = create_text_prompt(db_session, created_user.id, "explain NEAR and OR operators")
+
+    response = client.get('/api/v1/prompts/search?q="NEAR(*', headers=auth_header)
+
+    assert response.status_code == 200
+    assert [hit["id"] for hit in response.json()] == [prompt.id]
+    assert client.get("/api/v1/prompts/search?q=%22%2A", headers=auth_header).status_code == 400
+
+
+def stats_by_group(response) -> dict:
+    return {(item["category"], item["model_name"]): (item["prompt_count"], item["avg_rate"]) for item in response.json()}
+
+
+def test_prompt_stats_follow_create_update_delete_and_bulk(client, db_session, auth_header, created_user):
+    payload = {"model_name": "gpt-5", "prompt_text": "stats", "category": "dev", "rate": 4}
+    first = client.post("/api/v1/prompts", json=payload, headers=auth_header).json()
+    client.post("/api/v1/prompts", json={**payload, "rate": 2}, headers=auth_header)
+    client.put(f"/api/v1/prompts/{first['id']}", json={**payload, "category": "qa", "rate": 5}, headers=auth_header)
+    client.post(
+        "/api/v1/prompts/bulk",
+        content="\n".join(json.dumps({**payload, "rate": rate}) for rate in (1, 3)),
+        headers={**auth_header, "Content-Type": "application/x-ndjson"},
+    )
+
+    response = client.get("/api/v1/prompts/stats", headers=auth_header)
+
+    assert response.status_code == 200
+    assert stats_by_group(response) == {("dev", "gpt-5"): (3, 2.0), ("qa", "gpt-5"): (1, 5.0)}
+
+    client.delete(f"/api/v1/prompts/{first['id']}", headers=auth_header)
+    assert stats_by_group(client.get("/api/v1/prompts/stats", headers=auth_header)) == {("dev", "gpt-5"): (3, 2.0)}
+
+
+def test_prompt_stats_use_update_then_insert_without_native_upsert(client, auth_header, monkeypatch):
+    import db.prompt_stats as prompt_stats
+
+    monkeypatch.setattr(prompt_stats, "NATIVE_UPSERT_DIALECTS", set())
+    payload = {"model_name": "gpt-5", "prompt_text": "portable", "category": "dev", "rate": 4}
+    first = client.post("/api/v1/prompts", json=payload, headers=auth_header).json()
+    client.post("/api/v1/prompts", json={**payload, "rate": 2}, headers=auth_header)
+    client.put(f"/api/v1/prompts/{first['id']}", json={**payload, "category": "qa"}, headers=auth_header)
+
+    response = client.get("/api/v1/prompts/stats", headers=auth_header)
+
+    assert stats_by_group(response) == {("dev", "gpt-5"): (1, 2.0), ("qa", "gpt-5"): (1, 4.0)}
+
+
+def test_single_prompt_writes_lock_the_row_they_take_stats_from(client, db_session, auth_header, created_user):
+    prompt = create_prompt(db_session, created_user.id)
+    locked = []
+
+    def record(state):
+        compiled = str(state.statement.compile(dialect=mysql.dialect()))
+        if "FROM prompts" in compiled:
+            locked.append(compiled.rstrip().endswith("FOR UPDATE"))
+
+    event.listen(db_session, "do_orm_execute", record)
+    payload = {"model_name": "gpt-5", "prompt_text": "locked", "category": "dev", "rate": 2}
+    client.put(f"/api/v1/prompts/{prompt.id}", json=payload, headers=auth_header)
+    client.delete(f"/api/v1/prompts/{prompt.id}", headers=auth_header)
+    event.remove(db_session, "do_orm_execute", record)
+
+    assert locked == [True, True]
+
+
+def test_prompt_stats_scope_users_to_themselves_and_admins_to_everyone(client, db_session, auth_header, created_user):
+    admin = create_user(db_session, "stats_admin", role="admin")
+    headers = auth_headers_for(admin)
+    client.post("/api/v1/prompts", json={"model_name": "gpt-5", "prompt_text": "a", "category": "qa", "rate": 4}, headers=auth_header)
+    client.post("/api/v1/prompts", json={"model_name": "gpt-5", "prompt_text": "b", "category": "qa", "rate": 2}, headers=headers)
+
+    own = client.get(f"/api/v1/prompts/stats?user_id={admin.id}", headers=auth_header)
+    everyone = client.get("/api/v1/prompts/stats", headers=headers)
+    one_user = client.get(f"/api/v1/prompts/stats?user_id={admin.id}", headers=headers)
+
+    assert stats_by_group(own) == {("qa", "gpt-5"): (1, 4.0)}
+    assert stats_by_group(everyone) == {("qa", "gpt-5"): (2, 3.0)}
+    assert stats_by_group(one_user) == {("qa", "gpt-5"): (1, 2.0)}
+
+
+def test_batch_update_by_filter_touches_only_own_prompts_and_moves_stats(client, db_session, auth_header, created_user):
+    other = create_user(db_session, "batch_other")
+    for rate in (2, 4):
+        client.post("/api/v1/prompts", json={"model_name": "gpt-5", "prompt_text": "x", "category": "qa", "rate": rate}, headers=auth_header)
+    client.post("/api/v1/prompts", json={"model_name": "gpt-5", "prompt_text": "y", "category": "dev", "rate": 1}, headers=auth_header)
+    foreign = create_prompt(db_session, other.id, category="qa")
+
+    response = client.post(
+        "/api/v1/prompts/batch",
+        json={"action": "update", "filters": {"category": "qa"}, "values": {"category": "ops", "rate": 5}},
+        headers=auth_header,
+    )
+
+    assert response.json() == {"action": "update", "affected": 2}
+    db_session.expire_all()
+    assert db_session.get(Prompts, foreign.id).category == "qa"
+    assert stats_by_group(client.get("/api/v1/prompts/stats", headers=auth_header)) == {
+        ("dev", "gpt-5"): (1, 1.0),
+        ("ops", "gpt-5"): (2, 5.0),
+    }
+
+
+def test_batch_delete_by_ids_skips_other_users_prompts(client, db_session, auth_header, created_user):
+    other = create_user(db_session, "batch_delete_other")
+    own = client.post("/api/v1/prompts", json={"model_name": "gpt-5", "prompt_text": "x", "category": "qa", "rate": 3}, headers=auth_header).json()
+    foreign = create_prompt(db_session, other.id)
+
+    response = client.post(
+        "/api/v1/prompts/batch",
+        json={"action": "delete", "ids": [own["id"], foreign.id]},
+        headers=auth_header,
+    )
+
+    assert response.json() == {"action": "delete", "affected": 1}
+    assert db_session.exec(select(Prompts.id)).all() == [foreign.id]
+    assert client.get("/api/v1/prompts/stats", headers=auth_header).json() == []
+
+
+def test_batch_god_reaches_every_user_and_admin_is_refused(client, db_session, created_user):
+    god = create_user(db_session, "batch_god", role="god")
+    admin = create_user(db_session, "batch_admin", role="admin")
+    prompts = [create_prompt(db_session, user_id) for user_id in (created_user.id, admin.id)]
+    body = {"action": "delete", "ids": [prompt.id for prompt in prompts]}
+
+    refused = client.post("/api/v1/prompts/batch", json=body, headers=auth_headers_for(admin))
+    allowed = client.post("/api/v1/prompts/batch", json=body, headers=auth_headers_for(god))
+
+    assert refused.status_code == 403
+    assert refused.json()["detail"] == "Admins cannot delete prompts"
+    assert allowed.json() == {"action": "delete", "affected": 2}
+
+
+def test_batch_requires_exactly_one_selection_and_update_values(client, auth_header):
+    both = {"action": "delete", "ids": [1], "filters": {}}
+    no_values = {"action": "update", "ids": [1]}
+
+    assert client.post("/api/v1/prompts/batch", json=both, headers=auth_header).status_code == 422
+    assert client.post("/api/v1/prompts/batch", json=no_values, headers=auth_header).status_code == 422
+
+
+def test_batch_rejects_filters_without_a_field(client, db_session, auth_header, created_user):
+    prompt = create_prompt(db_session, created_user.id)
+
+    for filters in ({}, {"category": None, "rate": None}, {"category": "", "model_name": ""}):
+        response = client.post(
+            "/api/v1/prompts/batch", json={"action": "delete", "filters": filters}, headers=auth_header
+        )
+        assert response.status_code == 422
+        assert "filters needs at least one non-empty field" in response.text
+    assert db_session.exec(select(Prompts.id)).all() == [prompt.id]
+
+
+def test_batch_delete_by_another_users_id_is_refused(client, db_session, auth_header, created_user):
+    other = create_user(db_session, "batch_victim")
+    own = [create_prompt(db_session, created_user.id) for _ in range(3)]
+    foreign = create_prompt(db_session, other.id)
+
+    response = client.post(
+        "/api/v1/prompts/batch", json={"action": "delete", "filters": {"user_id": other.id}}, headers=auth_header
+    )
+
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Cannot delete another user's prompts"
+    assert sorted(db_session.exec(select(Prompts.id)).all()) == sorted([prompt.id for prompt in own] + [foreign.id])
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.hash import sha256_crypt
+from starlette.requests import Request
+
+import auth.rate_limit as rate_limit_module
+from auth.password_hasher import password_hasher
+from auth.rate_limit import SlidingWindowLimiter, ip_limiter, username_limiter
+from main import myapp
+from models.user import User
+
+
+class FakeSortedSetRedis:
+    """Just enough of a Redis client for the limiter's sorted-set pipeline."""
+
+    def __init__(self):
+        self.sets: dict[str, dict[str, float]] = {}
+        self._queued = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def zremrangebyscore(self, key, low, high):
+        self._queued.append(lambda: self._zremrangebyscore(key, low, high))
+
+    def zadd(self, key, mapping):
+        self._queued.append(lambda: self.sets.setdefault(key, {}).update(mapping))
+
+    def zcard(self, key):
+        self._queued.append(lambda: len(self.sets.get(key, {})))
+
+    def zrange(self, key, start, stop, withscores=False):
+        self._queued.append(lambda: sorted(self.sets.get(key, {}).items(), key=lambda item: item[1])[start:stop + 1])
+
+    def expire(self, key, seconds):
+        self._queued.append(lambda: True)
+
+    def execute(self):
+        queued, self._queued = self._queued, []
+        return [command() for command in queued]
+
+    def zrem(self, key, member):
+        return self.sets.get(key, {}).pop(member, None) is not None
+
+    def _zremrangebyscore(self, key, low, high):
+        members = self.sets.get(key, {})
+        for member, score in list(members.items()):
+            if low <= score <= high:
+                del members[member]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 1_000_000.0}
+    monkeypatch.setattr(rate_limit_module.time, "time", lambda: now["value"])
+    return now
+
+
+@pytest.mark.parametrize("redis_factory", [None, FakeSortedSetRedis], ids=["memory", "redis"])
+def test_sliding_window_rejects_until_oldest_attempt_expires(clock, redis_factory):
+    fake = redis_factory() if redis_factory else None
+    limiter = SlidingWindowLimiter(2, 60, redis_factory=(lambda: fake) if fake else None)
+
+    assert asyncio.run(limiter.hit("k")) == 0
+    clock["value"] += 10
+    assert asyncio.run(limiter.hit("k")) == 0
+    clock["value"] += 10
+    assert asyncio.run(limiter.hit("k")) == pytest.approx(40)
+    clock["value"] += 40
+    assert asyncio.run(limiter.hit("k")) == 0
+    assert limiter.rejected == 1
+    if fake:
+        assert len(fake.sets["ratelimit:k"]) == 2
+
+
+def test_limiter_falls_back_to_memory_when_redis_fails():
+    class DownRedis:
+        def pipeline(self, transaction=True):
+            raise OSError("connection refused")
+
+    limiter = SlidingWindowLimiter(1, 60, redis_factory=DownRedis)
+
+    assert asyncio.run(limiter.hit("k")) == 0
+    assert asyncio.run(limiter.hit("k")) > 0
+
+
+def test_login_is_throttled_per_username_before_hashing(client, db_session, monkeypatch):
+    db_session.add(User(
+        username="target",
+        name="target",
+        last_name="user",
+        email="target@example.com",
+        hashed_password=sha256_crypt.using(rounds=1000).hash("secret"),
+    ))
+    db_session.commit()
+    monkeypatch.setattr(username_limiter, "limit", 3)
+    for _ in range(3):
+        response = client.post("/api/v1/auth/login", json={"username": "Target", "password": "guess"})
+        assert response.status_code == 401
+    submitted = password_hasher.submitted
+
+    response = client.post("/api/v1/auth/login", json={"username": "target", "password": "guess"})
+
+    assert response.status_code == 429
+    assert 0 < int(response.headers["Retry-After"]) <= 60
+    assert password_hasher.submitted == submitted
+
+
+def test_login_is_throttled_per_client_ip(client, monkeypatch):
+    monkeypatch.setattr(ip_limiter, "limit", 2)
+
+    statuses = [
+        client.post("/api/v1/auth/login", json={"username": f"user{index}", "password": "guess"}).status_code
+        for index in range(3)
+    ]
+
+    assert statuses == [401, 401, 429]
+
+
+def test_client_ip_trusts_forwarded_for_only_from_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(rate_limit_module, "trusted_proxies", rate_limit_module.parse_networks("172.18.0.0/16, 10.0.0.1"))
+
+    def resolve(peer, *forwarded):
+        headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+        return rate_limit_module.client_ip(Request({"type": "http", "client": (peer, 5000), "headers": headers}))
+
+    assert resolve("203.0.113.9", "198.51.100.1") == "203.0.113.9"
+    assert resolve("172.18.0.5", "198.51.100.1") == "198.51.100.1"
+    # Entries left of the first untrusted hop are client-supplied and ignored.
+    assert resolve("172.18.0.5", "1.2.3.4, 198.51.100.1, 10.0.0.1") == "198.51.100.1"
+    assert resolve("172.18.0.5", "1.2.3.4", "198.51.100.1") == "198.51.100.1"
+    assert resolve("172.18.0.5", "not-an-ip") == "not-an-ip"
+    assert resolve("172.18.0.5") == "172.18.0.5"
+
+
+def test_login_behind_trusted_proxy_is_throttled_per_forwarded_ip(client, monkeypatch):
+    monkeypatch.setattr(ip_limiter, "limit", 2)
+    monkeypatch.setattr(rate_limit_module, "trusted_proxies", rate_limit_module.parse_networks("172.18.0.0/16"))
+
+    def attempt(proxy, forwarded_for):
+        return proxy.post(
+            "/api/v1/auth/login",
+            json={"username": "someone", "password": "guess"},
+            headers={"X-Forwarded-For": forwarded_for},
+        ).status_code
+
+    with TestClient(myapp, client=("172.18.0.5", 50000)) as proxy:
+        assert [attempt(proxy, "198.51.100.1") for _ in range(3)] == [401, 401, 429]
+        # Another client behind the same proxy has its own window.
+        assert attempt(proxy, "198.51.100.2") == 401
+    # Untrusted peers cannot choose their key with the header.
+    assert [attempt(client, f"198.51.100.{index}") for index in range(10, 13)] == [401, 401, 429]
+
+
+def test_generate_is_throttled_before_sending_email(client, monkeypatch):
+    monkeypatch.setattr(username_limiter, "limit", 1)
+    assert client.post("/api/v1/auth/generate", json={"username": "nobody"}).status_code == 404
+
+    response = client.post("/api/v1/auth/generate", json={"username": "nobody"})
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
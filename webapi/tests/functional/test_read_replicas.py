@@ -0,0 +1,101 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlmodel import create_engine
+from starlette.requests import Request
+
+import db.db_connection as db_connection
+from auth.auth_service import crear_jwt
+from db.replicas import Replica, ReplicaRouter, principal_key
+
+
+def request_for(username: str | None = None) -> Request:
+    headers = []
+    if username:
+        headers.append((b"authorization", f"Bearer {crear_jwt({'sub': username})}".encode()))
+    return Request({"type": "http", "headers": headers})
+
+
+def replica_with_marker(tmp_path, name: str) -> Replica:
+    engine = create_engine(f"sqlite:///{tmp_path / f'{name}.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE marker (name TEXT)"))
+        connection.execute(text("INSERT INTO marker VALUES (:name)"), {"name": name})
+    return Replica(name=name, engine=engine)
+
+
+def bound_engine(request: Request):
+    async def run():
+        dependency = db_connection.get_read_session(request)
+        session = await dependency.__anext__()
+        try:
+            return session.sync_session.get_bind()
+        finally:
+            await dependency.aclose()
+
+    return asyncio.run(run())
+
+
+def test_router_round_robins_and_skips_down_replicas():
+    first, second = Replica(name="a", engine=None), Replica(name="b", engine=None)
+    router = ReplicaRouter([first, second], pin_seconds=5, retry_seconds=30)
+
+    assert router.candidates()[0] is first
+    assert router.candidates()[0] is second
+
+    router.mark_down(first)
+    assert router.candidates() == [second]
+    assert router.candidates() == [second]
+
+
+def test_router_pins_writers_to_primary():
+    router = ReplicaRouter([Replica(name="a", engine=None)], pin_seconds=5, retry_seconds=30)
+
+    router.pin("writer")
+
+    assert router.candidates("writer") == []
+    assert len(router.candidates("reader")) == 1
+
+
+def test_principal_key_reads_token_subject():
+    assert principal_key(request_for("alice")) == "alice"
+    assert principal_key(request_for()) is None
+
+
+def test_read_session_skips_unreachable_replica(tmp_path, monkeypatch):
+    broken = Replica(name="broken", engine=create_engine(f"sqlite:///{tmp_path / 'missing' / 'x.db'}"))
+    healthy = replica_with_marker(tmp_path, "healthy")
+    router = ReplicaRouter([broken, healthy], pin_seconds=5, retry_seconds=30)
+    monkeypatch.setattr(db_connection, "replica_router", router)
+
+    assert bound_engine(request_for("reader")) is healthy.engine
+    assert router.candidates() == [healthy]
+
+
+def test_read_session_uses_primary_after_write(tmp_path, monkeypatch):
+    replica = replica_with_marker(tmp_path, "replica")
+    router = ReplicaRouter([replica], pin_seconds=5, retry_seconds=30)
+    monkeypatch.setattr(db_connection, "replica_router", router)
+
+    assert bound_engine(request_for("writer")) is replica.engine
+
+    router.pin("writer")
+
+    assert bound_engine(request_for("writer")) is db_connection.engine
+    assert bound_engine(request_for("reader")) is replica.engine
+
+
+def test_commit_through_primary_session_pins_caller(monkeypatch):
+    router = ReplicaRouter([Replica(name="a", engine=None)], pin_seconds=5, retry_seconds=30)
+    monkeypatch.setattr(db_connection, "replica_router", router)
+    request = request_for("committer")
+
+    async def run():
+        dependency = db_connection.get_session(request)
+        session = await dependency.__anext__()
+        await session.commit()
+        await dependency.aclose()
+
+    asyncio.run(run())
+
+    assert router.is_pinned("committer")
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import exc, text
+from sqlmodel import Session
+
+from auth.auth_service import crear_jwt
+from auth.password_hasher import password_hasher
+from core import config
+from db.db_connection import build_engine, engine_options, get_session
+from db.migrations import upgrade
+from db.threaded_session import ThreadedSession
+from main import myapp
+from models.user import User
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'embedded.db'}"
+
+
+def test_embedded_profile_uses_single_writer_and_reader_pool(db_url):
+    writer = engine_options(db_url)
+    reader = engine_options(db_url, sqlite_reader=True)
+
+    assert (writer["pool_size"], writer["max_overflow"]) == (1, 0)
+    assert (reader["pool_size"], reader["max_overflow"]) == (config.SQLITE_READER_POOL_SIZE, 0)
+    assert engine_options("sqlite://") == {}
+
+
+def test_embedded_profile_applies_pragmas(db_url):
+    writer = build_engine(db_url)
+    upgrade(writer)
+
+    with writer.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == config.SQLITE_BUSY_TIMEOUT_MS
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -config.SQLITE_CACHE_SIZE_KB
+
+
+def test_reader_connections_are_query_only(db_url):
+    upgrade(build_engine(db_url))
+    reader = build_engine(db_url, sqlite_reader=True)
+
+    with reader.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM prompts")).scalar() == 0
+        with pytest.raises(exc.OperationalError, match="readonly"):
+            connection.execute(text("DELETE FROM prompts"))
+
+
+def test_default_profile_keeps_stock_sqlite(db_url, monkeypatch):
+    monkeypatch.setattr(config, "SQLITE_PROFILE", "default")
+    stock = build_engine(db_url)
+
+    assert engine_options(db_url)["pool_size"] == config.DB_POOL_SIZE
+    with stock.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+
+
+def test_login_in_flight_does_not_block_writes_on_the_single_writer(client, db_url, monkeypatch):
+    writer = build_engine(db_url)
+    upgrade(writer)
+    with Session(writer) as session:
+        user = User(username="writer", name="w", last_name="u", email="writer@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        headers = {"Authorization": f"Bearer {crear_jwt({'sub': 'writer', 'role': 'user', 'user_id': user.id})}"}
+
+    async def writer_session():
+        async with ThreadedSession(Session(writer, expire_on_commit=False)) as session:
+            yield session
+
+    verifying = threading.Event()
+
+    async def slow_verify(password, hashed_password):
+        verifying.set()
+        await asyncio.sleep(1)
+        return False, None
+
+    myapp.dependency_overrides[get_session] = writer_session
+    monkeypatch.setattr(password_hasher, "verify_and_update", slow_verify)
+    login = threading.Thread(
+        target=client.post, args=("/api/v1/auth/login",), kwargs={"json": {"username": "writer", "password": "x"}}
+    )
+    login.start()
+    assert verifying.wait(5)
+
+    started = time.perf_counter()
+    response = client.post(
+        "/api/v1/prompts",
+        json={"model_name": "gpt-5", "prompt_text": "while verifying", "category": "qa", "rate": 3},
+        headers=headers,
+    )
+    elapsed = time.perf_counter() - started
+    login.join()
+
+    assert response.status_code == 200
+    assert elapsed < 0.5
@@ -0,0 +1,96 @@
+import time
+
+import jwt
+
+import api.endpoints.v1.auths as auths_module
+from auth.auth_service import crear_jwt
+from auth.revocation import CHANNEL, RevocationList
+from models.user import User
+
+
+def create_user(db_session, username: str, role: str = "user") -> User:
+    user = User(
+        username=username,
+        name=username,
+        last_name="User",
+        email=f"{username}@example.com",
+        hashed_password="password",
+        role=role,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def auth_headers_for(user: User) -> dict[str, str]:
+    token = crear_jwt({"sub": user.username, "role": user.role, "user_id": user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_tokens_carry_unique_jti():
+    first, second = (jwt.decode(crear_jwt({"sub": "same"}), options={"verify_signature": False}) for _ in range(2))
+
+    assert first["jti"] != second["jti"]
+
+
+def test_logout_revokes_only_the_presented_token(client, db_session, fake_redis):
+    user = create_user(db_session, "logout_user")
+    headers, other_headers = auth_headers_for(user), auth_headers_for(user)
+    assert client.get("/api/v1/options/models", headers=headers).status_code == 200
+
+    response = client.post("/api/v1/auth/logout", headers=headers)
+
+    assert response.status_code == 200
+    assert client.get("/api/v1/options/models", headers=headers).status_code == 401
+    assert client.get("/api/v1/options/models", headers=other_headers).status_code == 200
+    jti = jwt.decode(headers["Authorization"][7:], options={"verify_signature": False})["jti"]
+    assert f"revoked:jti:{jti}" in fake_redis.store
+    assert fake_redis.published[-1][0] == CHANNEL
+
+
+def test_delete_user_revokes_existing_tokens(client, db_session):
+    admin = create_user(db_session, "revoking_admin", role="admin")
+    victim = create_user(db_session, "revoked_victim")
+    victim_headers = auth_headers_for(victim)
+
+    assert client.delete(f"/api/v1/users/{victim.id}", headers=auth_headers_for(admin)).status_code == 200
+
+    # The claims-only tier would otherwise keep accepting the token.
+    assert client.get("/api/v1/options/models", headers=victim_headers).status_code == 401
+
+
+def test_password_recovery_revokes_existing_tokens(client, db_session, monkeypatch):
+    user = create_user(db_session, "recovering_user")
+    headers = auth_headers_for(user)
+
+    async def fake_send_email(to, username, body):
+        return None
+
+    monkeypatch.setattr(auths_module, "send_email", fake_send_email)
+
+    assert client.post("/api/v1/auth/generate", json={"username": user.username}).status_code == 200
+    assert client.get("/api/v1/options/models", headers=headers).status_code == 401
+
+
+def test_published_revocations_apply_in_other_processes():
+    other_process = RevocationList()
+    cutoff = time.time()
+
+    other_process.apply_message(f"user {cutoff} some user")
+    other_process.apply_message(f"jti {cutoff + 60} token-1")
+
+    assert other_process.is_revoked(None, "some user", int(cutoff) - 1)
+    assert not other_process.is_revoked(None, "some user", int(cutoff) + 2)
+    assert other_process.is_revoked("token-1", "someone else", cutoff)
+    assert not other_process.is_revoked("token-2", "someone else", cutoff)
+    assert other_process.stats() == {"tokens": 1, "users": 1, "listening": False}
+
+
+def test_revocation_stats_are_exposed_to_admins(client, db_session):
+    admin = create_user(db_session, "revocation_admin", role="admin")
+
+    response = client.get("/api/v1/admin/auth/revocations", headers=auth_headers_for(admin))
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"tokens", "users", "listening"}
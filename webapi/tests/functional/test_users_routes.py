@@ -31,6 +31,34 @@ def test_read_users_unauthorized_returns_401(client):
     assert response.json()["detail"] == "Unauthorized token"
 
 
+def test_read_users_cursor_pagination(client, auth_header, created_user, db_session):
+    for index in range(3):
+        db_session.add(
+            User(
+                username=f"page_user_{index}",
+                name="Page",
+                last_name="User",
+                email=f"page_user_{index}@example.com",
+                hashed_password="password",
+            )
+        )
+    db_session.commit()
+
+    first = client.get("/api/v1/users", params={"limit": 2}, headers=auth_header)
+    second = client.get(
+        "/api/v1/users",
+        params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+        headers=auth_header,
+    )
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    ids = [item["id"] for item in first.json() + second.json()]
+    assert ids == sorted(ids)
+    assert len(ids) == 4
+    assert "X-Next-Cursor" in second.headers
+
+
 def test_get_user_success(client, auth_header, created_user):
     response = client.get(f"/api/v1/users/{created_user.id}", headers=auth_header)
 
@@ -157,3 +185,102 @@ def test_delete_user_commit_exception_returns_500(client, auth_header, created_u
 
     assert response.status_code == 500
     assert "forced commit error" in response.json()["detail"]
+
+
+def test_export_users_streams_public_fields(client, auth_header, created_user):
+    response = client.get("/api/v1/users/export?format=csv", headers=auth_header)
+
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "id,username,name,last_name,email,role"
+    assert lines[1].startswith(f"{created_user.id},{created_user.username},")
+    assert "hashed_password" not in response.text
+    assert created_user.hashed_password not in response.text
+
+
+def seed_chunked_owner(client, db_session, prompt_count: int) -> User:
+    owner = User(username="owner", name="owner", last_name="user", email="owner@example.com", hashed_password="x")
+    god = User(username="deleter", name="d", last_name="u", email="deleter@example.com", hashed_password="x", role="god")
+    db_session.add_all([owner, god])
+    db_session.commit()
+    lines = "\n".join(
+        f'{{"user_id": {owner.id}, "model_name": "gpt-5", "prompt_text": "p{index}", "category": "qa", "rate": {index % 5 + 1}}}'
+        for index in range(prompt_count)
+    )
+    god_header = {"Authorization": f"Bearer {crear_jwt({'sub': god.username, 'role': god.role})}"}
+    client.post("/api/v1/prompts/bulk", content=lines, headers={**god_header, "Content-Type": "application/x-ndjson"})
+    return owner
+
+
+def stats_match_prompts(db_session) -> bool:
+    from sqlalchemy import func
+    from models.prompt_stats import PromptStats
+    from models.prompts import Prompts
+
+    db_session.expire_all()
+    actual = db_session.exec(
+        select(Prompts.user_id, Prompts.category, Prompts.model_name, func.count(), func.sum(Prompts.rate))
+        .group_by(Prompts.user_id, Prompts.category, Prompts.model_name)
+    ).all()
+    summary = db_session.exec(
+        select(PromptStats.user_id, PromptStats.category, PromptStats.model_name, PromptStats.prompt_count, PromptStats.rate_sum)
+        .where(PromptStats.prompt_count > 0)
+    ).all()
+    return sorted(actual) == sorted(summary)
+
+
+def test_delete_user_removes_prompts_and_stats_in_chunks(client, auth_header, created_user, db_session, engine, monkeypatch):
+    import api.endpoints.v1.users as users_module
+    from sqlalchemy import event
+    from models.prompt_stats import PromptStats
+    from models.prompts import Prompts
+
+    monkeypatch.setattr(users_module.config, "DB_DELETE_CHUNK_SIZE", 3)
+    owner = seed_chunked_owner(client, db_session, 8)
+    kept = client.post(
+        "/api/v1/prompts",
+        json={"model_name": "gpt-5", "prompt_text": "kept", "category": "qa", "rate": 3},
+        headers=auth_header,
+    ).json()
+    commits = []
+
+    def record_commit(connection):
+        commits.append(connection)
+
+    event.listen(engine, "commit", record_commit)
+
+    response = client.delete(f"/api/v1/users/{owner.id}", headers=auth_header)
+
+    event.remove(engine, "commit", record_commit)
+    assert response.status_code == 200
+    assert response.json()["id"] == owner.id
+    # Two chunks of three, then the remaining two prompts with the user row.
+    assert len(commits) == 3
+    db_session.expire_all()
+    assert db_session.get(User, owner.id) is None
+    assert db_session.exec(select(Prompts.id)).all() == [kept["id"]]
+    assert db_session.exec(select(PromptStats.user_id)).all() == [created_user.id]
+
+
+def test_delete_user_failing_after_chunks_leaves_stats_consistent(client, auth_header, db_session, monkeypatch):
+    import api.endpoints.v1.users as users_module
+    from models.prompts import Prompts
+
+    monkeypatch.setattr(users_module.config, "DB_DELETE_CHUNK_SIZE", 3)
+    owner = seed_chunked_owner(client, db_session, 8)
+    real_delete = users_module.delete
+
+    def delete_failing_on_user(entity):
+        if entity is User:
+            raise RuntimeError("user row is locked")
+        return real_delete(entity)
+
+    monkeypatch.setattr(users_module, "delete", delete_failing_on_user)
+
+    response = client.delete(f"/api/v1/users/{owner.id}", headers=auth_header)
+
+    assert response.status_code == 500
+    db_session.expire_all()
+    assert db_session.get(User, owner.id) is not None
+    assert len(db_session.exec(select(Prompts.id).where(Prompts.user_id == owner.id)).all()) == 2
+    assert stats_match_prompts(db_session)
\ No newline at end of file
@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import event
+from sqlmodel import select
+
+from auth.auth_service import crear_jwt
+from models.prompts import Prompts
+from models.user import User
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL statements the test engine executes while the test runs."""
+    executed: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def seeded(db_session):
+    owner = User(
+        username="counted",
+        name="counted",
+        last_name="user",
+        email="counted@example.com",
+        hashed_password="password",
+        role="user",
+    )
+    db_session.add(owner)
+    db_session.commit()
+    db_session.refresh(owner)
+    for rate in range(1, 6):
+        db_session.add(Prompts(user_id=owner.id, model_name="gpt-4.1", prompt_text="counted", category="qa", rate=rate))
+    db_session.commit()
+    prompt_id = db_session.exec(select(Prompts.id)).first()
+    token = crear_jwt({"sub": owner.username, "role": owner.role, "user_id": owner.id})
+    db_session.expunge_all()
+    return {"user_id": owner.id, "prompt_id": prompt_id, "headers": {"Authorization": f"Bearer {token}"}}
+
+
+# Routes authenticated with get_current_db_user pay one user lookup on a
+# principal cache miss and must never load the user's prompts. Prompt writes
+# add one prompt_stats upsert.
+ROUTE_QUERY_COUNTS = [
+    ("GET", "/api/v1/users", 1),
+    ("GET", "/api/v1/users/{user_id}", 1),
+    ("GET", "/api/v1/users/prompts/{user_id}", 2),
+    ("GET", "/api/v1/prompts", 1),
+    ("GET", "/api/v1/prompts/{prompt_id}", 1),
+    ("PUT", "/api/v1/prompts/{prompt_id}", 5),
+    ("DELETE", "/api/v1/prompts/{prompt_id}", 3),
+]
+
+
+@pytest.mark.parametrize("method, path, expected", ROUTE_QUERY_COUNTS)
+def test_route_query_count(client, seeded, statements, method, path, expected):
+    kwargs = {"headers": seeded["headers"]}
+    if method == "PUT":
+        kwargs["json"] = {"model_name": "gpt-5", "prompt_text": "updated", "category": "dev", "rate": 2}
+    statements.clear()
+
+    response = client.request(method, path.format(**seeded), **kwargs)
+
+    assert response.status_code == 200
+    assert len(statements) == expected, statements
+
+
+def test_auth_lookup_does_not_load_prompts(client, seeded, statements):
+    statements.clear()
+
+    client.get("/api/v1/auth/me", headers=seeded["headers"])
+
+    assert len([sql for sql in statements if "FROM user" in sql]) == 1
+    assert not [sql for sql in statements if "FROM prompts" in sql]
+
+
+@pytest.mark.parametrize("path", ["/api/v1/users", "/api/v1/users/{user_id}", "/api/v1/users/prompts/{user_id}"])
+def test_user_reads_never_select_password_hash(client, seeded, statements, path):
+    statements.clear()
+
+    response = client.get(path.format(**seeded), headers=seeded["headers"])
+
+    assert response.status_code == 200
+    assert "hashed_password" not in response.text
+    assert not [sql for sql in statements if "hashed_password" in sql]
+
+
+def test_cached_principal_skips_user_lookup(client, seeded, statements):
+    client.get("/api/v1/auth/me", headers=seeded["headers"])
+    statements.clear()
+
+    response = client.get("/api/v1/auth/me", headers=seeded["headers"])
+
+    assert response.status_code == 200
+    assert not [sql for sql in statements if "FROM user" in sql]
+
+
+def test_token_without_role_claims_falls_back_to_user_lookup(client, seeded, statements):
+    token = crear_jwt({"sub": "counted"})
+    statements.clear()
+
+    response = client.get("/api/v1/options/categories", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert len([sql for sql in statements if "FROM user" in sql]) == 1
@@ -0,0 +1,112 @@
+import itertools
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, text
+from sqlmodel import create_engine
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from api.endpoints.v1.prompts import build_prompts_query
+from api.endpoints.v1.users import chunk_boundary_query
+from db.migrations import upgrade
+from models.prompts import Prompts
+from models.user import User
+from schemas.prompt_schema import PromptFilters
+
+# Point at a disposable MariaDB schema to run the same checks there.
+PLAN_DB_URL = os.getenv("QUERY_PLAN_DB_URL", "sqlite://")
+
+FILTER_VALUES = {"user_id": 3, "category": "dev", "model_name": "gpt-5", "rate": 4}
+CATEGORIES = ["qa", "dev", "ops", "writing", "research"]
+MODELS = ["gpt-4.1", "gpt-4o-mini", "gpt-5", "gpt-5-mini"]
+
+
+@pytest.fixture(scope="module")
+def plan_engine():
+    engine = create_engine(PLAN_DB_URL)
+    upgrade(engine)
+    rng = random.Random(7)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User),
+            [
+                {
+                    "username": f"plan_user_{index}",
+                    "name": "Plan",
+                    "last_name": "User",
+                    "email": f"plan_user_{index}@example.com",
+                    "hashed_password": "x",
+                    "role": "user",
+                }
+                for index in range(50)
+            ],
+        )
+        connection.execute(
+            insert(Prompts),
+            [
+                {
+                    "user_id": rng.randint(1, 50),
+                    "model_name": rng.choice(MODELS),
+                    "prompt_text": f"seeded prompt {index}",
+                    "category": rng.choice(CATEGORIES),
+                    "rate": rng.randint(1, 5),
+                }
+                for index in range(5000)
+            ],
+        )
+        connection.execute(text("ANALYZE"))
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM prompts"))
+        connection.execute(text("DELETE FROM user"))
+
+
+def full_scans(connection, statement) -> list[str]:
+    """Plan steps that read the whole prompts table instead of seeking an index."""
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        details = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+        return [detail for detail in details if detail.startswith("SCAN prompts")]
+    rows = connection.exec_driver_sql(f"EXPLAIN {sql}").mappings()
+    return [f"{row['table']}: type={row['type']}" for row in rows if row["type"] in {"ALL", "index"}]
+
+
+def filter_combinations():
+    names = list(FILTER_VALUES)
+    for size in range(len(names) + 1):
+        for combination in itertools.combinations(names, size):
+            yield {name: FILTER_VALUES[name] for name in combination}
+
+
+CASES = [
+    pytest.param(role, filters, last_id, id=f"{role}-{'+'.join(filters) or 'nofilter'}-{'cursor' if last_id else 'first'}")
+    for role in ("user", "admin")
+    for filters in filter_combinations()
+    for last_id in (None, 1000)
+    # An unfiltered admin first page walks the primary key by design.
+    if not (role == "admin" and not filters and last_id is None)
+]
+
+
+@pytest.mark.parametrize("role, filters, last_id", CASES)
+def test_read_prompts_plans_never_scan_prompts(plan_engine, role, filters, last_id):
+    current_user = User(id=3, username="planner", role=role)
+    statement = build_prompts_query(current_user, PromptFilters(**filters), last_id).limit(10)
+
+    with plan_engine.connect() as connection:
+        assert full_scans(connection, statement) == []
+
+
+def test_chunked_delete_boundary_seeks_owner_index_in_id_order(plan_engine):
+    statement = chunk_boundary_query(3, 100)
+
+    with plan_engine.connect() as connection:
+        assert full_scans(connection, statement) == []
+        if connection.dialect.name == "sqlite":
+            sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+            details = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+            assert not any("TEMP B-TREE" in detail for detail in details), details